@@ -0,0 +1,45 @@
+"""Compares the per-shape and the batched bounding box conversions
+
+Usage: python -m benchmarks.benchmark_bounding_boxes [num_shapes ...]
+"""
+import sys
+import timeit
+
+import numpy as np
+
+from sama import SAMADatasetImporter
+
+DEFAULT_SIZES = [10, 500, 100000]
+ELEMENT = {"data": {"Annotation Height": "720", "Annotation Width": "1280"}}
+
+
+def build_rectangles(num_shapes, seed=0):
+    """This method returns a list of random rectangles in SAMA point format"""
+    rng = np.random.default_rng(seed)
+    x = np.sort(rng.integers(0, 1280, size=(num_shapes, 2)), axis=1)
+    y = np.sort(rng.integers(0, 720, size=(num_shapes, 2)), axis=1)
+    return [[[x1, y1], [x2, y1], [x1, y2], [x2, y2]]
+            for (x1, x2), (y1, y2) in zip(x.tolist(), y.tolist())]
+
+
+def main(sizes):
+    importer = SAMADatasetImporter()
+    print(f"{'shapes':>8} {'per shape (us)':>15} {'batched (us)':>13} {'speedup':>8}")
+    for num_shapes in sizes:
+        rectangles = build_rectangles(num_shapes)
+        repeat = max(1, 100000 // num_shapes)
+
+        per_shape = min(timeit.repeat(
+            lambda: [importer._from_points_to_voxel51_bounding_box(points, ELEMENT)
+                     for points in rectangles],
+            number=repeat, repeat=3)) / repeat
+        batched = min(timeit.repeat(
+            lambda: importer._from_points_to_voxel51_bounding_boxes(rectangles, 1280, 720),
+            number=repeat, repeat=3)) / repeat
+
+        print(f"{num_shapes:>8} {per_shape / num_shapes * 1e6:>15.2f} "
+              f"{batched / num_shapes * 1e6:>13.2f} {per_shape / batched:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or DEFAULT_SIZES)
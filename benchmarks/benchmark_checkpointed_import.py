@@ -0,0 +1,57 @@
+"""Compares fo.Dataset.from_dir with import_sama_delivery_with_checkpoints on synthetic deliveries
+
+Usage: python -m benchmarks.benchmark_checkpointed_import [num_tasks ...]
+
+Both write with dataset.add_samples and the default batcher of the FiftyOne
+config and both save a checkpoint, the difference is the cost of committing
+it after every write. It needs the MongoDB of FiftyOne. Every import writes
+into a new temporary dataset that is deleted afterwards.
+"""
+import os
+import sys
+import tempfile
+import time
+
+import fiftyone as fo
+
+from sama import CustomLabeledImageDataset, import_sama_delivery_with_checkpoints
+from .generator import generate_delivery, write_delivery
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+
+def time_from_dir(path, checkpoint_path):
+    start = time.perf_counter()
+    dataset = fo.Dataset.from_dir(
+        dataset_dir=path, dataset_type=CustomLabeledImageDataset, 
+        checkpoint_path=checkpoint_path)
+    seconds = time.perf_counter() - start
+    dataset.delete()
+    return seconds
+
+
+def time_import_sama_delivery_with_checkpoints(path, checkpoint_path):
+    dataset = fo.Dataset()
+    start = time.perf_counter()
+    import_sama_delivery_with_checkpoints(dataset, path, checkpoint_path=checkpoint_path)
+    seconds = time.perf_counter() - start
+    dataset.delete()
+    return seconds
+
+
+def main(sizes):
+    print(f"{'tasks':>8} {'from_dir (s)':>13} {'commits (s)':>12} {'overhead':>9}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for num_tasks in sizes:
+            path = os.path.join(tmp_dir, f"{num_tasks}_delivery.json")
+            write_delivery(path, generate_delivery(num_tasks))
+
+            from_dir = time_from_dir(path, os.path.join(tmp_dir, f"{num_tasks}_from_dir.json"))
+            commits = time_import_sama_delivery_with_checkpoints(
+                path, os.path.join(tmp_dir, f"{num_tasks}_commits.json"))
+            print(f"{num_tasks:>8} {from_dir:>13.2f} {commits:>12.2f} "
+                  f"{commits / from_dir - 1:>8.1%}")
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or DEFAULT_SIZES)
@@ -0,0 +1,74 @@
+"""Times the labels index of SAMADatasetImporter for growing deliveries
+
+Usage: python -m benchmarks.benchmark_labels_index [num_tasks ...]
+
+The time per task should stay flat when the number of tasks grows, that is
+the import time grows linearly with the size of the delivery.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+from sama import SAMADatasetImporter
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+
+def build_delivery(num_tasks):
+    """This method returns a list of SAMA tasks with one rectangle each"""
+    return [{
+        "id": str(i),
+        "data": {
+            "Image": f"https://asset.samasource.org/{i}.jpg",
+            "Annotation Height": "720",
+            "Annotation Width": "1280"
+        },
+        "answers": {
+            "Image Annotation": {
+                "layers": {
+                    "vector_tagging": [{
+                        "shapes": [{
+                            "tags": {"Vehicle": "other_vehicle"},
+                            "type": "rectangle",
+                            "index": 1,
+                            "points": [[67, 199], [254, 199], [67, 433], [254, 433]]
+                        }]
+                    }]
+                }
+            }
+        },
+    } for i in range(num_tasks)]
+
+
+def time_import(path):
+    """This method returns the seconds spent in setup() and in the labels lookup"""
+    importer = SAMADatasetImporter(dataset_dir=path)
+    start = time.perf_counter()
+    importer.setup()
+    setup_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for filename in importer._filenames:
+        importer._get_sample_labels(filename)
+    lookup_time = time.perf_counter() - start
+
+    return setup_time, lookup_time
+
+
+def main(sizes):
+    print(f"{'tasks':>10} {'setup (s)':>10} {'lookup (s)':>11} {'us/task':>9}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for num_tasks in sizes:
+            path = os.path.join(tmp_dir, f"{num_tasks}_delivery.json")
+            with open(path, "w") as f:
+                json.dump(build_delivery(num_tasks), f)
+
+            setup_time, lookup_time = time_import(path)
+            per_task = (setup_time + lookup_time) / num_tasks * 1e6
+            print(f"{num_tasks:>10} {setup_time:>10.3f} {lookup_time:>11.4f} {per_task:>9.1f}")
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or DEFAULT_SIZES)
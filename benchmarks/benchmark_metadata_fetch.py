@@ -0,0 +1,86 @@
+"""Measures the metadata download throughput of SAMADatasetImporter
+
+Usage: python -m benchmarks.benchmark_metadata_fetch [num_samples] [latency_ms]
+
+A local HTTP server stands in for the asset server. It serves the same
+fixture image for every URL after an artificial latency, and the importer
+runs in metadata='fetch' mode with 1, 8 and 64 downloads in flight.
+"""
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from PIL import Image
+
+from sama import SAMADatasetImporter, MetadataMode
+
+WORKERS = [1, 8, 64]
+
+
+def build_fixture_image(width=1280, height=720):
+    content = io.BytesIO()
+    Image.new('RGB', (width, height)).save(content, format='JPEG')
+    return content.getvalue()
+
+
+def start_asset_server(image, latency):
+    """This method returns a running HTTP/1.1 server that serves image for any path"""
+
+    class AssetHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header('Content-Type', 'image/jpeg')
+            self.send_header('Content-Length', str(len(image)))
+            self.end_headers()
+            self.wfile.write(image)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), AssetHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def time_metadata_fetch(path, workers):
+    """This method returns the samples per second of a full iteration"""
+    importer = SAMADatasetImporter(
+        dataset_dir=path, metadata=MetadataMode.FETCH.value, metadata_workers=workers)
+    importer.setup()
+    start = time.perf_counter()
+    num_samples = sum(1 for _ in iter(importer))
+    elapsed = time.perf_counter() - start
+    importer.close()
+    return num_samples / elapsed
+
+
+def main(num_samples=1000, latency_ms=20):
+    server = start_asset_server(build_fixture_image(), latency_ms / 1000)
+    base_url = f'http://127.0.0.1:{server.server_port}/https'
+    data = [{"id": str(i), "data": {"Image": f"{base_url}/{i}.jpg"}, "answers": {}}
+            for i in range(num_samples)]
+
+    print(f"{num_samples} samples, {latency_ms} ms server latency")
+    print(f"{'in flight':>10} {'samples/s':>10}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'delivery.json')
+        with open(path, 'w') as f:
+            json.dump(data, f)
+
+        for workers in WORKERS:
+            print(f"{workers:>10} {time_metadata_fetch(path, workers):>10.1f}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
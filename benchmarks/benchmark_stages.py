@@ -0,0 +1,102 @@
+"""Times every stage of SAMADatasetImporter on synthetic deliveries
+
+Usage: python -m benchmarks.benchmark_stages [go|platform] [num_tasks ...]
+
+The stages are run one after the other on the same delivery:
+
+    json_load           etas.load_json of the delivery file
+    task_contexts       _build_task_context of every task, with the schema
+                        inferred from the first tasks
+    detections_fields   _get_detections_fields of every task with layers
+    store_append        AnnotationStore.append of the TaskRecord of every task
+    store_labels        AnnotationStore.get_labels of every row
+    setup               SAMADatasetImporter.setup(), the whole conversion
+    metadata            _request_sample_metadata of every sample
+    iteration           every sample returned by __next__, with its labels
+    setup+iteration     setup and iteration, the whole import, so moving work
+                        from one to the other is not a regression
+
+Each delivery size is measured in a fresh process, so the peak memory is the
+maximum resident size of the process that ran the stages of that size.
+"""
+import concurrent.futures
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import eta.core.serial as etas
+
+from sama import SCHEMA_SAMPLE_SIZE, AnnotationStore, SAMADatasetImporter
+from .generator import LAYOUTS, generate_delivery, write_delivery
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+STAGES = ["json_load", "task_contexts", "detections_fields", "store_append",
+          "store_labels", "setup", "metadata", "iteration", "setup+iteration"]
+
+
+def run_stages(path):
+    """This method returns the seconds spent in each stage and the peak memory in bytes"""
+    timings = {}
+
+    def timed(stage, function):
+        start = time.perf_counter()
+        result = function()
+        timings[stage] = time.perf_counter() - start
+        return result
+
+    importer = SAMADatasetImporter(dataset_dir=path)
+    tasks = timed("json_load", lambda: etas.load_json(path))
+    importer._prepare_task_schema(tasks[:SCHEMA_SAMPLE_SIZE])
+    contexts = timed("task_contexts", lambda: [importer._build_task_context(task) for task in tasks])
+    timed("detections_fields", lambda: [
+        importer._get_detections_fields(context.layers, context)
+        for context in contexts if context.layers is not None])
+    records = [importer._convert_sama_task(task) for task in tasks]
+    store = AnnotationStore()
+    timed("store_append", lambda: [store.append(record) for record in records])
+    store.freeze()
+    timed("store_labels", lambda: [store.get_labels(row) for row in range(len(store))])
+    del tasks, contexts, records, store
+
+    importer = SAMADatasetImporter(dataset_dir=path)
+    timed("setup", importer.setup)
+    timed("metadata", lambda: [
+        importer._request_sample_metadata(filename, importer._get_sample_dimensions(filename))
+        for filename in importer._filenames])
+    timed("iteration", lambda: sum(1 for _ in iter(importer)))
+    importer.close()
+    timings["setup+iteration"] = timings["setup"] + timings["iteration"]
+
+    # ru_maxrss is in kilobytes on Linux
+    return timings, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def measure(path):
+    """This method runs run_stages in a new process and returns its result"""
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(run_stages, path).result()
+
+
+def main(layout, sizes):
+    print(f"{'tasks':>8} {'stage':>17} {'seconds':>9} {'tasks/s':>11}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for num_tasks in sizes:
+            path = os.path.join(tmp_dir, f"{num_tasks}_{layout}_delivery.json")
+            write_delivery(path, generate_delivery(num_tasks, layout))
+
+            timings, peak_memory = measure(path)
+            for stage in STAGES:
+                seconds = timings[stage]
+                print(f"{num_tasks:>8} {stage:>17} {seconds:>9.3f} {num_tasks / seconds:>11.0f}")
+            print(f"{num_tasks:>8} {'peak memory':>17} {peak_memory / 2**20:>8.0f}M")
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    arguments = sys.argv[1:]
+    layout = arguments.pop(0) if arguments and arguments[0] in LAYOUTS else "platform"
+    main(layout, [int(size) for size in arguments] or DEFAULT_SIZES)
@@ -0,0 +1,102 @@
+"""Generates synthetic SAMA deliveries for the benchmarks
+
+Usage: python -m benchmarks.generator num_tasks path [go|platform] [max_shapes]
+
+Sama Go tasks keep their layers under answers._vector and the image size in
+integer "Asset Width"/"Asset Height" fields. Sama Platform tasks keep them
+under a project specific answer key and string "Annotation Width"/"Annotation
+Height" fields. Tasks get a random number of rectangles, a few scene
+attributes, and a fraction of them come with empty answers.
+"""
+import json
+import random
+import sys
+
+LAYOUTS = ("platform", "go")
+IMAGE_SIZES = [(1280, 720), (1920, 1080), (640, 480), (4000, 3000)]
+SHAPE_TAGS = {
+    "Vehicle": ["car", "truck", "bus", "motorcycle", "other_vehicle"],
+    "Person": ["pedestrian", "cyclist", "rider"],
+    "Sign": ["stop", "yield", "speed_limit"],
+}
+SCENE_ATTRIBUTES = {
+    "Time of day": ["day", "night", "dusk", "dawn"],
+    "Weather": ["clear", "rain", "snow", "fog"],
+    "Scene": ["highway", "city", "residential", "parking"],
+}
+
+
+def generate_delivery(num_tasks, layout="platform", min_shapes=0, max_shapes=10,
+                      empty_ratio=0.05, seed=0):
+    """This method yields num_tasks synthetic SAMA tasks
+
+    Every task has between min_shapes and max_shapes rectangles, except the
+    empty_ratio of tasks whose answers are empty. The same seed always yields
+    the same delivery.
+    """
+    if layout not in LAYOUTS:
+        raise ValueError(f"{layout} is not one of {LAYOUTS}")
+
+    rng = random.Random(seed)
+    for i in range(num_tasks):
+        yield generate_task(i, rng, layout, min_shapes, max_shapes, empty_ratio)
+
+
+def generate_task(i, rng, layout, min_shapes, max_shapes, empty_ratio):
+    """This method returns one synthetic SAMA task"""
+    width, height = rng.choice(IMAGE_SIZES)
+    url = f"https://asset.samasource.org/delivery/{i}.jpg"
+    if layout == "go":
+        data = {"url": url, "Asset Width": width, "Asset Height": height}
+    else:
+        data = {"Image": url, "Annotation Width": str(width), "Annotation Height": str(height)}
+
+    task = {"id": f"{i:08d}", "data": data, "answers": {}}
+    if rng.random() < empty_ratio:
+        return task
+
+    shapes = [generate_rectangle(index, rng, width, height)
+              for index in range(rng.randint(min_shapes, max_shapes))]
+    layers = {"layers": {"vector_tagging": [{"shapes": shapes}]}}
+    answers = {name: rng.choice(values) for name, values in SCENE_ATTRIBUTES.items()}
+    answers["_vector" if layout == "go" else "Image Annotation"] = layers
+    task["answers"] = answers
+    return task
+
+
+def generate_rectangle(index, rng, width, height):
+    """This method returns a rectangle shape in SAMA point format"""
+    x1, x2 = sorted(rng.sample(range(width), 2))
+    y1, y2 = sorted(rng.sample(range(height), 2))
+    tag = rng.choice(list(SHAPE_TAGS))
+    return {
+        "tags": {tag: rng.choice(SHAPE_TAGS[tag])},
+        "type": "rectangle",
+        "index": index + 1,
+        "points": [[x1, y1], [x2, y1], [x1, y2], [x2, y2]],
+    }
+
+
+def write_delivery(path, tasks):
+    """This method writes the tasks as a JSON array one task at a time and returns their count"""
+    num_tasks = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for task in tasks:
+            if num_tasks:
+                f.write(",\n")
+            f.write(json.dumps(task))
+            num_tasks += 1
+        f.write("]")
+    return num_tasks
+
+
+def main(argv):
+    num_tasks, path = int(argv[0]), argv[1]
+    layout = argv[2] if len(argv) > 2 else "platform"
+    max_shapes = int(argv[3]) if len(argv) > 3 else 10
+    write_delivery(path, generate_delivery(num_tasks, layout, max_shapes=max_shapes))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,165 @@
+"""Fails when the stage benchmarks get slower than the stored baseline
+
+Usage: python -m benchmarks.regression_gate check [baseline.json]
+       python -m benchmarks.regression_gate record [baseline.json]
+
+record runs the stage benchmarks of benchmarks.benchmark_stages several times
+and stores the median and interquartile range (IQR) of the microseconds per
+task of every stage, and of the peak memory, in a JSON file kept in git.
+check runs them again and exits with status 1 when the median of a stage is
+above the baseline median by more than the tolerance plus the baseline IQR.
+
+The setup+iteration metric is the whole import. Moving work between setup
+and iteration shows up in those two stages but not in it.
+
+Stages faster than MIN_SECONDS in the baseline are reported but not gated,
+their timings are mostly noise. The baseline is only meaningful on the
+machine it was recorded on; check warns when the platform differs.
+"""
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+
+from .benchmark_stages import STAGES, measure
+from .generator import generate_delivery, write_delivery
+
+BASELINE_VERSION = 2
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_BENCHMARKS = [("platform", 2000), ("go", 2000)]
+DEFAULT_REPEAT = 5
+DEFAULT_TOLERANCE = 0.2
+MIN_SECONDS = 0.01
+PEAK_MEMORY = "peak_memory"
+
+
+def summarize(values):
+    """This method returns the median and the interquartile range of values"""
+    if len(values) == 1:
+        return {"median": round(values[0], 3), "iqr": 0.0}
+    first, _, third = statistics.quantiles(values, n=4)
+    return {"median": round(statistics.median(values), 3), "iqr": round(third - first, 3)}
+
+
+def run_benchmark(layout, num_tasks, repeat):
+    """This method returns the summary of every stage and of the peak memory
+
+    The stages are summarized in microseconds per task and the peak memory in
+    bytes. Every repetition runs in a new process on the same delivery.
+    """
+    samples = {stage: [] for stage in STAGES + [PEAK_MEMORY]}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, f"{num_tasks}_{layout}_delivery.json")
+        write_delivery(path, generate_delivery(num_tasks, layout))
+        for _ in range(repeat):
+            timings, peak_memory = measure(path)
+            for stage in STAGES:
+                samples[stage].append(timings[stage] / num_tasks * 1e6)
+            samples[PEAK_MEMORY].append(peak_memory)
+
+    return {name: summarize(values) for name, values in samples.items()}
+
+
+def run_benchmarks(benchmarks, repeat):
+    return {f"{layout}-{num_tasks}": {
+                "layout": layout,
+                "num_tasks": num_tasks,
+                "metrics": run_benchmark(layout, num_tasks, repeat)}
+            for layout, num_tasks in benchmarks}
+
+
+def get_environment():
+    return {"python": platform.python_version(), "machine": platform.machine(),
+            "system": platform.system(), "cpus": os.cpu_count()}
+
+
+def record(path, benchmarks=DEFAULT_BENCHMARKS, repeat=DEFAULT_REPEAT, tolerance=DEFAULT_TOLERANCE):
+    """This method runs the benchmarks and writes them as the baseline in path"""
+    baseline = {
+        "version": BASELINE_VERSION,
+        "repeat": repeat,
+        "tolerance": tolerance,
+        "environment": get_environment(),
+        "benchmarks": run_benchmarks(benchmarks, repeat),
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2)
+        f.write("\n")
+    return baseline
+
+
+def compare(baseline, current, tolerance):
+    """This method returns a list of rows (benchmark, metric, baseline, current, change, status)
+
+    status is 'ok', 'REGRESSION', or 'not gated' for the stages faster than
+    MIN_SECONDS in the baseline.
+    """
+    rows = []
+    for name, benchmark in baseline["benchmarks"].items():
+        num_tasks = benchmark["num_tasks"]
+        for metric, expected in benchmark["metrics"].items():
+            observed = current[name]["metrics"][metric]
+            change = observed["median"] / expected["median"] - 1 if expected["median"] else 0.0
+            limit = expected["median"] * (1 + tolerance) + expected["iqr"]
+            if metric != PEAK_MEMORY and expected["median"] * num_tasks / 1e6 < MIN_SECONDS:
+                status = "not gated"
+            elif observed["median"] > limit:
+                status = "REGRESSION"
+            else:
+                status = "ok"
+            rows.append((name, metric, expected["median"], observed["median"], change, status))
+    return rows
+
+
+def format_value(metric, value):
+    if metric == PEAK_MEMORY:
+        return f"{value / 2**20:.0f}M"
+    return f"{value:.1f}us"
+
+
+def check(path):
+    """This method compares new runs with the baseline in path and returns the exit status"""
+    with open(path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("version") != BASELINE_VERSION:
+        print(f"The baseline {path} has version {baseline.get('version')}, "
+              f"expected {BASELINE_VERSION}. Record it again")
+        return 2
+    if baseline["environment"] != get_environment():
+        print(f"WARNING, the baseline was recorded on {baseline['environment']}, "
+              f"this is {get_environment()}")
+
+    benchmarks = [(benchmark["layout"], benchmark["num_tasks"])
+                  for benchmark in baseline["benchmarks"].values()]
+    current = run_benchmarks(benchmarks, baseline["repeat"])
+    rows = compare(baseline, current, baseline["tolerance"])
+
+    print(f"{'benchmark':>15} {'metric':>17} {'baseline':>10} {'current':>10} {'change':>8}  status")
+    for name, metric, expected, observed, change, status in rows:
+        print(f"{name:>15} {metric:>17} {format_value(metric, expected):>10} "
+              f"{format_value(metric, observed):>10} {change:>+8.1%}  {status}")
+
+    regressions = [row for row in rows if row[-1] == "REGRESSION"]
+    if regressions:
+        print(f"{len(regressions)} metrics are more than {baseline['tolerance']:.0%} "
+              f"plus the IQR above the baseline")
+        return 1
+    return 0
+
+
+def main(argv):
+    command = argv[0] if argv else "check"
+    path = argv[1] if len(argv) > 1 else DEFAULT_BASELINE_PATH
+    if command == "record":
+        record(path)
+        return 0
+    if command == "check":
+        return check(path)
+    print(__doc__)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
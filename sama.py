@@ -1,8 +1,29 @@
 import fiftyone.utils.data as foud
 import fiftyone.core.metadata as fom
+import fiftyone.core.utils as fou
 import eta.core.serial as etas # Package comes with FiftyOne
 import numpy as np
+import array
+import collections
+import concurrent.futures
+import functools
+import glob
+import hashlib
+import heapq
+import io
+import itertools
+import json
 import math
+import mimetypes
+import os
+import random
+import re
+import requests
+import sqlite3
+import threading
+import time
+import tracemalloc
+import urllib.parse
 from enum import Enum
 import fiftyone.types as fot
 import fiftyone as fo
@@ -16,17 +37,195 @@ class Substring(Enum):
 class SearchIn(Enum):
     KEY = 'key'
     VALUE = 'value'
-    
+
+
+class DuplicateUrl(Enum):
+    FIRST = 'first'
+    LAST = 'last'
+    ERROR = 'error'
+
+
+class MetadataMode(Enum):
+    FETCH = 'fetch'
+    TASK = 'task'
+
+
+# Characters read from the delivery file at a time in streaming mode
+STREAM_CHUNK_SIZE = 1 << 20
+WHITESPACE = re.compile(r'\s*')
+
+# Tasks at the head of a delivery used to infer its TaskSchema
+SCHEMA_SAMPLE_SIZE = 100
+
+# Tasks sent at a time to a worker process when num_workers > 1
+TASKS_PER_CHUNK = 256
+
+# Assets downloaded at the same time when the metadata has to be fetched
+DEFAULT_METADATA_WORKERS = 8
+# Seconds to wait for an asset server before giving up
+DEFAULT_FETCH_TIMEOUT = 30
+# Size caps of the image metadata cache tiers, in entries
+DEFAULT_CACHE_MEMORY_ENTRIES = 10000
+DEFAULT_CACHE_DISK_ENTRIES = 1000000
+# Writes to the SQLite cache between two checks of its size cap
+CACHE_EVICTION_INTERVAL = 1000
+# Query parameters of pre-signed URLs that change between deliveries
+SIGNED_URL_PARAMETERS = ('x-amz-', 'signature', 'expires', 'awsaccesskeyid', 'x-goog-')
+
+
+# Samples imported between two writes of the checkpoint file
+DEFAULT_CHECKPOINT_EVERY = 1000
+
+# Distinct strings interned during the conversion, the vocabulary of the 
+# annotation store is not capped as the store keeps them alive anyway
+MAX_INTERNED_STRINGS = 100000
+
+# Tasks listed in the slow task report
+DEFAULT_SLOW_TASKS = 20
+
+# Allocation sites listed per stage in the memory profile
+DEFAULT_MEMORY_TOP = 10
+
+# Seconds between two writes of the Prometheus metrics file
+DEFAULT_METRICS_INTERVAL = 10
+
+# Methods of SAMADatasetImporter timed by a tracer, generators excluded
+TRACED_METHODS = (
+    'setup', '_parse_sama_labels', '_parse_sama_samples', '_load_sama_tasks', 
+    '_prepare_task_schema', '_convert_sama_element', '_build_task_context', 
+    '_get_answers_layers', '_get_answer_scene_attributes', '_from_answer_to_detection',
+    '_get_detections_fields', '_from_points_to_voxel51_bounding_box', 
+    '_from_points_to_voxel51_bounding_boxes', '_build_sample', '_build_samples_index',
+    '_store_record', '_build_sample_source_labels',
+    '_request_sample_metadata', '_resolve_sample_metadata',
+)
+
+# Layout of the tasks written by SAMADatasetExporter
+EXPORT_LABELS_FILENAME = 'delivery.json'
+EXPORT_URL_KEY = 'Image'
+EXPORT_WIDTH_KEY = 'Annotation Width'
+EXPORT_HEIGHT_KEY = 'Annotation Height'
+EXPORT_LAYERS_KEY = 'Image Annotation'
+EXPORT_LABEL_TAG = 'Label'
+# Fields of the source task of a sample added by SAMADatasetImporter with
+# sama_fields=True and read back by SAMADatasetExporter
+SAMA_URL_FIELD = 'sama_url'
+SAMA_TASK_ID_FIELD = 'sama_task_id'
+# An https URL stored by FiftyOne as a local path, <cwd>/https:/host/a.jpg
+NORMALIZED_URL = re.compile(r'(?:^|/)https:/+(.+)$')
+
+# A delivery file of the import and its number of tasks, None until it is read
+DeliveryFile = collections.namedtuple('DeliveryFile', ['path', 'num_tasks'])
+
+# Picklable result of converting a task. detections is a list of the
+# fo.Detection fields, or None when the task has no answer layers. profile
+# is (conversion seconds, serialized size) when slow tasks are reported
+TaskRecord = collections.namedtuple(
+    'TaskRecord', ['url', 'dimensions', 'detections', 'scene_attributes', 'task_id', 'profile'],
+    defaults=(None,))
+
+
 class SAMADatasetImporter(foud.LabeledImageDatasetImporter):
     """ Import SAMA-formatted datasets into FiftyOne
         Args:
-            dataset_dir (None): the dataset directory. This may be optional for
-                some importers
+            dataset_dir (None): a delivery JSON file, a directory of delivery
+                files or a glob pattern of delivery files. Several files are 
+                imported in path order as one stream of samples
             shuffle (False): whether to randomly shuffle the order in which the
-                samples are imported
+                samples are imported. In streaming mode it needs max_samples
+                and the samples are drawn with reservoir sampling
             seed (None): a random seed to use when shuffling
             max_samples (None): a maximum number of samples to import. By default,
-                all samples are imported
+                all samples are imported. Without shuffle the delivery is only
+                read until max_samples distinct assets are found, unless 
+                duplicate_urls='last' needs the later tasks of every asset
+            duplicate_urls ('first'): what to do with an asset URL delivered in
+                more than one task. 'first' keeps the labels of the first task,
+                'last' keeps the labels of the last task and 'error' raises a
+                SAMADatasetImporterException
+            streaming (False): whether to read the delivery file one task at a
+                time while iterating instead of loading it in setup(). Memory
+                stays bounded by the size of one task, but the number of
+                samples is not known a priori and duplicate_urls='last' is not
+                supported
+            metadata ('task'): where the ImageMetadata of each sample comes
+                from. 'task' builds it from the "Width" and "Height" fields of
+                the task data and 'fetch' downloads every asset
+            metadata_fallback (True): whether to download the asset when the
+                task data has no dimensions in 'task' mode. If False the
+                sample is imported without metadata
+            metadata_workers (8): the maximum number of assets downloaded at 
+                the same time when the metadata has to be fetched. Upcoming 
+                samples are prefetched and returned in delivery order
+            metadata_cache (None): an ImageMetadataCache, or the path of its
+                SQLite file, consulted before downloading an asset. The same
+                cache can be shared by several importers and processes
+            infer_schema (True): whether to find the keys of the URL, image 
+                size and answer layers in the first tasks of the delivery and
+                read them directly from every task. Tasks that do not follow
+                them fall back to searching their keys
+            task_schema (None): a dictionary mapping 'url', 'width', 'height'
+                and 'layers' to JMESPath-style paths in the task, like 
+                'data."Annotation Width"'. They take precedence over the 
+                inferred keys
+            num_workers (1): the number of processes that convert the tasks.
+                Chunks of tasks are converted to plain TaskRecords in worker
+                processes and the labels are built from them, in delivery 
+                order, in the importing process. Several delivery files are
+                parsed by the worker processes at the same time
+            checkpoint_path (None): a JSON file where the progress of the 
+                import is saved. A new importer with the same checkpoint_path 
+                and delivery skips the tasks already imported without 
+                converting them. fo.Dataset.from_dir does not report which 
+                samples it wrote, so the checkpoint is written one flush 
+                behind and up to twice checkpoint_every samples are imported
+                again on resume. Resume with 
+                dataset.merge_importer(importer, key_field='filepath') to 
+                avoid duplicates, or import with 
+                import_sama_delivery_with_checkpoints, which commits the 
+                checkpoint after every write
+            checkpoint_every (1000): the number of samples between two writes
+                of the checkpoint file
+            checkpoint_commits (False): whether the checkpoint is only 
+                written by commit_checkpoint(), called by the caller with the
+                number of returned samples written to the dataset
+            delta_path (None): a JSON file with the content hash of every 
+                task of the previous import. Only the new tasks and the tasks
+                whose answers changed are converted and imported, and the 
+                file is updated once all the samples were imported. The ids of
+                the changed tasks are in changed_task_ids and the ids of the 
+                tasks missing from the delivery in deleted_task_ids. A changed
+                task is a new sample for from_dir, which keeps the sample of
+                the previous import next to it. Import a delta with 
+                dataset.merge_importer(importer, key_field='filepath') so the
+                samples of the changed tasks are replaced
+            tracer (None): a Tracer, a callable called with (name, start, 
+                duration, args) for every span, or the path of a Chrome trace
+                file written in close(). Spans time setup(), __next__ and the
+                conversion and metadata methods in TRACED_METHODS. The gaps 
+                between __next__ spans are the time spent by FiftyOne. Tasks
+                converted by worker processes are not traced
+            metrics_path (None): a Prometheus text format file where the 
+                metrics of the import are written every metrics_interval 
+                seconds and in close(), for the textfile collector of the 
+                node exporter. The metrics attribute can always be polled
+            metrics_interval (10): the seconds between two writes of 
+                metrics_path
+            slow_tasks (None): the number of slowest tasks kept in 
+                slow_task_report. The conversion of every task is timed and
+                its serialized size is measured. By default tasks are not
+                timed
+            slow_tasks_path (None): a JSON file where slow_task_report is 
+                written in close()
+            memory_profile_path (None): a text file where the allocations 
+                of each stage, traced with tracemalloc from setup() on, are 
+                reported in close(). Tracing makes the import several times
+                slower
+            sama_fields (False): whether to add to the labels of every sample
+                a 'sama_url' and a 'sama_task_id' field with the asset URL 
+                and the id of its task. FiftyOne stores URL filepaths as local
+                paths, these fields let SAMADatasetExporter write the task 
+                back for re-annotation
             **kwargs: additional keyword arguments for your importer
         """
 
@@ -36,6 +235,26 @@ class SAMADatasetImporter(foud.LabeledImageDatasetImporter):
         shuffle=False,
         seed=None,
         max_samples=None,
+        duplicate_urls=DuplicateUrl.FIRST.value,
+        streaming=False,
+        metadata=MetadataMode.TASK.value,
+        metadata_fallback=True,
+        metadata_workers=DEFAULT_METADATA_WORKERS,
+        metadata_cache=None,
+        infer_schema=True,
+        task_schema=None,
+        num_workers=1,
+        checkpoint_path=None,
+        checkpoint_every=DEFAULT_CHECKPOINT_EVERY,
+        checkpoint_commits=False,
+        delta_path=None,
+        tracer=None,
+        metrics_path=None,
+        metrics_interval=DEFAULT_METRICS_INTERVAL,
+        slow_tasks=None,
+        slow_tasks_path=None,
+        memory_profile_path=None,
+        sama_fields=False,
         **kwargs, # Add any other arguments you want
     ):
         super().__init__(
@@ -44,33 +263,487 @@ class SAMADatasetImporter(foud.LabeledImageDatasetImporter):
             seed=seed,
             max_samples=max_samples,
         )
+        if duplicate_urls not in [item.value for item in DuplicateUrl]:
+            raise SAMADatasetImporterException(
+                f'ERROR, {duplicate_urls} is not a valid duplicate_urls option')
+        if streaming and duplicate_urls == DuplicateUrl.LAST.value:
+            raise SAMADatasetImporterException(
+                f'ERROR, duplicate_urls={duplicate_urls} is not supported in streaming mode')
+        if metadata not in [item.value for item in MetadataMode]:
+            raise SAMADatasetImporterException(
+                f'ERROR, {metadata} is not a valid metadata option')
+        if metadata_workers < 1:
+            raise SAMADatasetImporterException(
+                f'ERROR, metadata_workers must be at least 1')
+        if streaming and shuffle and max_samples is None:
+            raise SAMADatasetImporterException(
+                f'ERROR, shuffle needs max_samples in streaming mode')
+        if shuffle and checkpoint_path is not None:
+            raise SAMADatasetImporterException(
+                f'ERROR, shuffle is not supported with checkpoint_path')
+        if max_samples is not None and delta_path is not None:
+            raise SAMADatasetImporterException(
+                f'ERROR, max_samples is not supported with delta_path')
+        self.duplicate_urls = duplicate_urls
+        self.streaming = streaming
+        self.metadata = metadata
+        self.metadata_fallback = metadata_fallback
+        self.metadata_workers = metadata_workers
+        self._metadata_fetcher = None
+        self._owns_metadata_cache = isinstance(metadata_cache, str)
+        self._metadata_cache_path = None
+        if self._owns_metadata_cache:
+            self._metadata_cache_path = metadata_cache
+            metadata_cache = ImageMetadataCache(path=metadata_cache)
+        self.metadata_cache = metadata_cache
+        self.infer_schema = infer_schema
+        self._user_task_schema = None
+        if task_schema is not None:
+            self._user_task_schema = TaskSchema.from_mapping(task_schema)
+        self._task_schema = self._user_task_schema
+        self.num_workers = num_workers
+        self.annotation_store = None
+        self.vocabulary = Vocabulary(max_interned=MAX_INTERNED_STRINGS)
+        self.manifest = []
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_commits = checkpoint_commits
+        self._checkpoint = None
+        self._start_position = (0, 0)
+        self._sample_positions = {}
+        self.delta_path = delta_path
+        self._task_hashes = None
+        self._exhausted = False
+        self.changed_task_ids = []
+        self.deleted_task_ids = []
+        self._owns_tracer = isinstance(tracer, str)
+        if self._owns_tracer:
+            tracer = ChromeTracer(tracer)
+        elif tracer is not None and not isinstance(tracer, Tracer):
+            tracer = CallbackTracer(tracer)
+        self._tracer = tracer
+        if tracer is not None:
+            # Untraced importers keep the plain methods and pay nothing
+            for name in TRACED_METHODS:
+                setattr(self, name, self._trace_method(name))
+        self.metrics = ImportMetrics(metadata_cache=self.metadata_cache)
+        self.metrics_path = metrics_path
+        self.metrics_interval = metrics_interval
+        self._metrics_written = None
+        if slow_tasks is None and slow_tasks_path is not None:
+            slow_tasks = DEFAULT_SLOW_TASKS
+        self.slow_task_report = None
+        if slow_tasks is not None:
+            self.slow_task_report = SlowTaskReport(slow_tasks)
+        self.slow_tasks_path = slow_tasks_path
+        self.memory_profile_path = memory_profile_path
+        self.memory_profiler = None
+        if memory_profile_path is not None:
+            self.memory_profiler = MemoryProfiler()
+        self.sama_fields = sama_fields
         
     def setup(self):
-        annotations = self._parse_sama_labels(self.dataset_dir)
-        self._filenames = [key for dict in annotations for key in dict.keys()]
-        self._annotations = annotations 
+        if self.memory_profiler is not None:
+            self.memory_profiler.start()
+        delivery_paths = self._resolve_delivery_paths(self.dataset_dir)
+        self.manifest = [DeliveryFile(path, None) for path in delivery_paths]
+        if self.checkpoint_path is not None:
+            self._checkpoint = ImportCheckpoint(
+                self.checkpoint_path, 
+                ImportCheckpoint.hash_delivery(delivery_paths), 
+                flush_every=self.checkpoint_every,
+                explicit_commits=self.checkpoint_commits)
+            self._start_position = self._checkpoint.load()
+        if self.delta_path is not None:
+            self._task_hashes = TaskHashTable.load(self.delta_path)
+
+        if self.streaming:
+            # Tasks are parsed lazily in __next__
+            self.annotation_store = None
+            self._samples_index = None
+            self._filenames = None
+            return
+
+        start_file, start_task = self._start_position
+        self.annotation_store = AnnotationStore(self.vocabulary)
+        positions = []
+        sample_limit = self._get_sample_limit()
+        limited_urls = set()
+        files = self._convert_sama_files(delivery_paths[start_file:], start_task)
+        for i, (num_tasks, records) in enumerate(files, start_file):
+            self.manifest[i] = DeliveryFile(delivery_paths[i], num_tasks)
+            first_task = start_task if i == start_file else 0
+            for task_index, record in enumerate(records, first_task):
+                if record is None:
+                    continue # Unchanged since the previous import
+                self._store_record(record)
+                positions.append((i, task_index, record.task_id))
+                if sample_limit is not None:
+                    limited_urls.add(record.url)
+                    if len(limited_urls) >= sample_limit:
+                        break
+            self._snapshot_memory('annotation_store')
+            if sample_limit is not None and len(limited_urls) >= sample_limit:
+                files.close() # The remaining files are not read
+                break
+        self.annotation_store.freeze()
+        self._samples_index = self._build_samples_index(self.annotation_store.urls)
+        self._filenames = list(self._samples_index.keys())
+        if self.shuffle:
+            self._filenames = self._shuffle_samples(self._filenames)
+        if self.max_samples is not None:
+            self._filenames = self._filenames[:self.max_samples]
+        self._snapshot_memory('samples_index')
+        if self._checkpoint is not None:
+            for url, position in zip(self.annotation_store.urls, positions):
+                self._sample_positions.setdefault(url, position)
+        self._find_task_changes()
+        self.metrics.expected_samples = len(self._filenames)
         
+    def _get_sample_limit(self):
+        """This method returns the number of distinct assets after which setup() stops parsing, or None
+
+        With shuffle the samples are drawn from the whole delivery, and with
+        duplicate_urls='last' an asset may be delivered again in a later task.
+        """
+        if self.shuffle or self.duplicate_urls == DuplicateUrl.LAST.value:
+            return None
+        return self.max_samples
+
+    def _shuffle_samples(self, filenames):
+        """This method returns the filenames in the order of a permutation seeded with seed"""
+        order = list(range(len(filenames)))
+        random.Random(self.seed).shuffle(order)
+        return [filenames[i] for i in order]
+
     def __len__(self):
+        if self.streaming:
+            return super().__len__() # Not known until the file is read
         return len(self._filenames) # Parsed in setup()
     
     # A convenient way to iterate through samples one at a time
     def __iter__(self):
-        self._iter_filenames = iter(self._filenames)
+        self._iter_samples = self._iter_samples_with_metadata()
+        self.metrics.start_iteration()
+        self._metrics_written = time.monotonic()
         return self
 
     def __next__(self):
-        filename = next(self._iter_filenames)
-        sample_labels = self._get_sample_labels(filename)
-        metadata = fom.ImageMetadata.build_for(filename)
-        
-        return filename, metadata, sample_labels
+        if self._tracer is None:
+            return self._next_sample()
+        with self._tracer.span('__next__'):
+            return self._next_sample()
+
+    def _next_sample(self):
+        try:
+            sample = next(self._iter_samples)
+        except StopIteration:
+            self._exhausted = True
+            self._snapshot_memory('iteration')
+            raise
+        except Exception:
+            self.metrics.errors += 1
+            raise
+        self.metrics.samples += 1
+        if (self.metrics_path is not None 
+                and time.monotonic() - self._metrics_written >= self.metrics_interval):
+            self.metrics.write_prometheus(self.metrics_path)
+            self._metrics_written = time.monotonic()
+        if self._checkpoint is not None:
+            self._checkpoint.update(self._sample_positions.pop(sample[0]))
+        return sample
+
+    def commit_checkpoint(self, num_samples=None):
+        """This method saves in the checkpoint the position of the last sample written
+
+        With checkpoint_commits=True, call it after every write with the 
+        number of samples written, by default all the samples returned so far.
+        """
+        if self._checkpoint is not None:
+            self._checkpoint.commit(num_samples)
+
+    def close(self, *args):
+        # FiftyOne passes the exception of a failed import
+        completed = not args or args[0] is None
+        if self._checkpoint is not None:
+            self._checkpoint.close(completed=completed)
+            self._checkpoint = None
+        if self._task_hashes is not None and completed and self._exhausted:
+            self._task_hashes.save(resumed=self._start_position != (0, 0))
+        if self._metadata_fetcher is not None:
+            self._metadata_fetcher.close()
+            self._metadata_fetcher = None
+        if self._owns_metadata_cache and self.metadata_cache is not None:
+            self.metadata_cache.close()
+            self.metadata_cache = None
+        if self._owns_tracer and self._tracer is not None:
+            self._tracer.close()
+        if self.metrics_path is not None:
+            self.metrics.write_prometheus(self.metrics_path)
+        if self.slow_tasks_path is not None:
+            self.slow_task_report.write(self.slow_tasks_path)
+        if self.memory_profiler is not None:
+            if self.memory_profiler.started and not self._exhausted:
+                # An import stopped early or failed is reported up to here
+                self._snapshot_memory('iteration')
+            self.memory_profiler.stop()
+            if self.memory_profiler.stages:
+                self.memory_profiler.write(
+                    self.memory_profile_path, self.metrics.tasks_converted, 
+                    self.metrics.detections)
+
+    def _snapshot_memory(self, stage):
+        if self.memory_profiler is not None:
+            self.memory_profiler.snapshot(stage)
+
+    def _trace_method(self, name):
+        """This method returns the bound method name wrapped in a span of the tracer"""
+        method = getattr(self, name)
+        tracer = self._tracer
+
+        @functools.wraps(method)
+        def traced(*args, **kwargs):
+            with tracer.span(name):
+                return method(*args, **kwargs)
+
+        return traced
 
     def _get_sample_labels(self, filename):
-        for element in self._annotations: 
-            for key,value in element.items():
-                if key == filename:
-                    return value
-        
+        return self.annotation_store.get_labels(self._samples_index[filename])
+
+    def _get_sample_dimensions(self, filename):
+        return self.annotation_store.dimensions[self._samples_index[filename]]
+
+    def _iter_samples_with_metadata(self):
+        """This method yields a tuple (url, metadata, labels) per sample in import order
+
+        Metadata that has to be downloaded is requested ahead of time, with up
+        to twice metadata_workers samples waiting, and is handed back in the 
+        order of the delivery. The labels of a sample are only built when it
+        is handed back.
+        """
+        pending = collections.deque()
+        max_pending = 2 * self.metadata_workers
+        for filename, sample_source, dimensions in self._iter_sample_sources():
+            metadata = self._request_sample_metadata(filename, dimensions)
+            pending.append((filename, metadata, sample_source))
+            if len(pending) >= max_pending:
+                yield self._resolve_sample_metadata(*pending.popleft())
+
+        while pending:
+            yield self._resolve_sample_metadata(*pending.popleft())
+
+    def _resolve_sample_metadata(self, filename, metadata, sample_source):
+        if isinstance(metadata, concurrent.futures.Future):
+            metadata = metadata.result()
+            if self.metadata_cache is not None:
+                self.metadata_cache.put(filename, metadata)
+        return filename, metadata, self._build_sample_source_labels(sample_source)
+
+    def _build_sample_source_labels(self, sample_source):
+        """This method returns the labels of a row of the annotation store or of a TaskRecord"""
+        if isinstance(sample_source, TaskRecord):
+            labels = self._build_sample_labels(sample_source)[1]
+            url, task_id = sample_source.url, sample_source.task_id
+        else:
+            labels = self.annotation_store.get_labels(sample_source)
+            url = self.annotation_store.urls[sample_source]
+            task_id = self.annotation_store.task_ids[sample_source]
+        if not self.sama_fields:
+            return labels
+        return {**labels, SAMA_URL_FIELD: url, SAMA_TASK_ID_FIELD: task_id}
+
+    def _request_sample_metadata(self, filename, dimensions):
+        """This method returns the ImageMetadata of a sample
+
+        The asset is only downloaded when the task data has no dimensions, or
+        always in 'fetch' mode, and it is not in the metadata cache. The 
+        download runs in the background and a Future of the ImageMetadata is 
+        returned instead.
+        """
+        if dimensions is not None:
+            width, height = dimensions
+            return fom.ImageMetadata(
+                width=width,
+                height=height,
+                # The query of pre-signed URLs hides the extension
+                mime_type=mimetypes.guess_type(urllib.parse.urlsplit(filename).path)[0])
+
+        if self.metadata == MetadataMode.TASK.value and not self.metadata_fallback:
+            return None
+
+        if self.metadata_cache is not None:
+            metadata = self.metadata_cache.get(filename)
+            if metadata is not None:
+                return metadata
+
+        if self._metadata_fetcher is None:
+            self._metadata_fetcher = ImageMetadataFetcher(max_workers=self.metadata_workers)
+        return self._metadata_fetcher.submit(filename)
+
+    def _iter_sample_labels(self):
+        """This method yields a tuple (url, labels, dimensions) per sample in import order"""
+        for filename, sample_source, dimensions in self._iter_sample_sources():
+            yield filename, self._build_sample_source_labels(sample_source), dimensions
+
+    def _iter_sample_sources(self):
+        """This method yields a tuple (url, source, dimensions) per sample in import order
+
+        The source is the row of the sample in the annotation store, or its 
+        TaskRecord in streaming mode, from which the labels are built. In 
+        streaming mode the tasks are read and converted one at a time, only 
+        the URLs already imported are kept to resolve duplicates.
+        """
+        if not self.streaming:
+            for filename in self._filenames:
+                yield (filename, 
+                       self._samples_index[filename], 
+                       self._get_sample_dimensions(filename))
+            return
+
+        if self.shuffle:
+            yield from self._iter_drawn_sample_sources()
+            return
+
+        seen_urls = set()
+        start_file, start_task = self._start_position
+        for i, delivery_file in enumerate(self.manifest):
+            if i < start_file:
+                continue
+            # Tasks before the checkpoint are decoded but not converted
+            first_task = start_task if i == start_file else 0
+            tasks = self._filter_unchanged_tasks(self._iter_sama_tasks(delivery_file.path))
+            tasks = itertools.islice(tasks, first_task, None)
+            head = list(itertools.islice(tasks, SCHEMA_SAMPLE_SIZE))
+            self._prepare_task_schema([element for element in head if element is not None])
+            num_tasks = first_task
+            for record in self._convert_sama_tasks(itertools.chain(head, tasks)):
+                task_index = num_tasks
+                num_tasks += 1
+                if record is None:
+                    continue # Unchanged since the previous import
+                self._consume_record(record)
+                url = record.url
+                if url in seen_urls:
+                    if self.duplicate_urls == DuplicateUrl.ERROR.value:
+                        raise SAMADatasetImporterException(
+                            f'ERROR, the asset {url} is delivered more than once')
+                    continue
+                seen_urls.add(url)
+                if self._checkpoint is not None:
+                    self._sample_positions[url] = (i, task_index, record.task_id)
+                yield url, record, record.dimensions
+                if self.max_samples is not None and len(seen_urls) >= self.max_samples:
+                    return # The rest of the delivery is not read
+            self.manifest[i] = DeliveryFile(delivery_file.path, num_tasks)
+        self._find_task_changes()
+
+    def _iter_drawn_sample_sources(self):
+        """This method yields the sources of max_samples assets drawn at random from a streamed delivery
+
+        The tasks are decoded one at a time. The first task of every distinct
+        asset URL goes through a reservoir of max_samples tasks, in which it
+        replaces a random task with probability max_samples / assets read, so
+        every asset is drawn with the same probability. Only the tasks left 
+        in the reservoir are converted, in an order shuffled with seed.
+        """
+        rng = random.Random(self.seed)
+        reservoir = []
+        seen_urls = set()
+        for i, delivery_file in enumerate(self.manifest):
+            tasks = self._iter_sama_tasks(delivery_file.path)
+            head = list(itertools.islice(tasks, SCHEMA_SAMPLE_SIZE))
+            self._prepare_task_schema(head)
+            num_tasks = 0
+            for element in itertools.chain(head, tasks):
+                num_tasks += 1
+                url = self._build_task_context(element).url
+                if url in seen_urls:
+                    if self.duplicate_urls == DuplicateUrl.ERROR.value:
+                        raise SAMADatasetImporterException(
+                            f'ERROR, the asset {url} is delivered more than once')
+                    continue
+                seen_urls.add(url)
+                if len(reservoir) < self.max_samples:
+                    reservoir.append(element)
+                    continue
+                replaced = rng.randrange(len(seen_urls))
+                if replaced < self.max_samples:
+                    reservoir[replaced] = element
+            self.manifest[i] = DeliveryFile(delivery_file.path, num_tasks)
+
+        rng.shuffle(reservoir)
+        for record in self._convert_sama_tasks(reservoir):
+            self._consume_record(record)
+            yield record.url, record, record.dimensions
+
+    def _filter_unchanged_tasks(self, elements):
+        """This method yields the tasks with the ones unchanged since the previous import replaced by None
+
+        None keeps the position of the task in its delivery file.
+        """
+        if self._task_hashes is None:
+            return iter(elements)
+        return map(self._task_hashes.filter, elements)
+
+    def _find_task_changes(self):
+        if self._task_hashes is None:
+            return
+        self.changed_task_ids = self._task_hashes.changed_task_ids()
+        if self._start_position == (0, 0):
+            # A resumed import did not read the tasks before its checkpoint
+            self.deleted_task_ids = self._task_hashes.deleted_task_ids()
+
+    def _resolve_delivery_paths(self, dataset_dir):
+        """This method returns the sorted list of delivery files of dataset_dir
+
+        dataset_dir is a delivery file, a directory with .json delivery files
+        or a glob pattern. The files written by the importer, like its 
+        checkpoint, are not deliveries.
+        """
+        if os.path.isdir(dataset_dir):
+            paths = glob.glob(os.path.join(dataset_dir, '*.json'))
+        elif any(char in dataset_dir for char in '*?['):
+            paths = [path for path in glob.glob(dataset_dir) if os.path.isfile(path)]
+        else:
+            return [dataset_dir]
+
+        output_paths = self._get_output_paths()
+        paths = sorted(path for path in paths if os.path.abspath(path) not in output_paths)
+
+        if not paths:
+            raise SAMADatasetImporterException(
+                f'ERROR, there are no delivery files in {dataset_dir}')
+        return paths
+
+    def _get_output_paths(self):
+        """This method returns the absolute paths of the files read and written by the importer"""
+        paths = [self.checkpoint_path, self.delta_path, self.metrics_path, 
+                 self.slow_tasks_path, self.memory_profile_path, 
+                 self._metadata_cache_path]
+        if self._owns_tracer:
+            paths.append(self._tracer.path)
+        return {os.path.abspath(path) for path in paths if path is not None}
+
+    def _build_samples_index(self, urls):
+        """This method returns a dictionary with the row of the annotation store keyed by asset URL
+
+        urls are the URLs of the rows. The dictionary keeps the order in which
+        the URLs appear in the delivery. An URL delivered in more than one task
+        is resolved with duplicate_urls
+        """
+        index = {}
+        for row, url in enumerate(urls):
+            if url not in index:
+                index[url] = row
+            elif self.duplicate_urls == DuplicateUrl.LAST.value:
+                index[url] = row
+            elif self.duplicate_urls == DuplicateUrl.ERROR.value:
+                raise SAMADatasetImporterException(
+                    f'ERROR, the asset {url} is delivered more than once')
+
+        return index
+
 
     @property
     def label_cls(self):
@@ -91,46 +764,338 @@ class SAMADatasetImporter(foud.LabeledImageDatasetImporter):
         Each annotation is a dictionary. The key corresponds to the asset s3 URI
         ans the value contains the scene attributes and a list of detections.
         """
-        labels_dict = etas.load_json(dataset_dir)
-        result = []
-        detections = []
-        for element in labels_dict:
-            layer = self._get_answers_layers(element)
-            url = self._get_url(element)
-
-            if layer != None :
-                detections = self._from_answer_to_detection(layer, element)
-                scene_attributes = self._get_answer_scene_attributes(element)
-                result.append({url:{**detections, **scene_attributes}})
-            else:
-                result.append({url:{}})
+        return [{url: labels} for url, labels, _ in self._parse_sama_samples(dataset_dir)]
 
+    def _parse_sama_samples(self, dataset_dir):
+        """This method returns a list of tuples (url, labels, dimensions), one per task"""
+        labels_dict = self._load_sama_tasks(dataset_dir)
+        return [self._build_sample(record) for record in self._convert_sama_tasks(labels_dict)]
+
+    def _load_sama_tasks(self, dataset_dir):
+        """This method returns the tasks of a delivery and prepares its TaskSchema"""
+        labels_dict = etas.load_json(dataset_dir)
+        if not isinstance(labels_dict, list):
+            raise SAMADatasetImporterException(
+                f'ERROR, the delivery {dataset_dir} is not a list of tasks')
+        self._prepare_task_schema(labels_dict[:SCHEMA_SAMPLE_SIZE])
+        return labels_dict
+
+    def _convert_sama_files(self, paths, skip_tasks=0):
+        """This method yields a tuple (number of tasks, TaskRecords) per delivery file in order
+
+        The first skip_tasks tasks of the first file are not converted, nor
+        the tasks unchanged since the previous import, whose record is None. 
+        With num_workers > 1 and several files, each worker process loads and
+        converts whole files. A single file is split in chunks instead.
+
+        When setup() stops at max_samples, the files are decoded one task at
+        a time and the TaskRecords are yielded lazily, so the tasks after the
+        limit are neither read nor converted. The number of tasks of a file
+        is then None.
+        """
+        if self._get_sample_limit() is not None:
+            for i, path in enumerate(paths):
+                skip = skip_tasks if i == 0 else 0
+                tasks = itertools.islice(self._iter_sama_tasks(path), skip, None)
+                head = list(itertools.islice(tasks, SCHEMA_SAMPLE_SIZE))
+                self._prepare_task_schema(head)
+                yield None, self._convert_sama_tasks(itertools.chain(head, tasks))
+            return
+
+        if self.num_workers <= 1 or len(paths) == 1:
+            for i, path in enumerate(paths):
+                elements = list(self._filter_unchanged_tasks(self._load_sama_tasks(path)))
+                self._snapshot_memory('json_load')
+                skip = skip_tasks if i == 0 else 0
+                records = list(self._convert_sama_tasks(elements[skip:]))
+                self._snapshot_memory('conversion')
+                yield len(elements), records
+            return
+
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.num_workers,
+                initializer=_init_conversion_worker,
+                initargs=self._get_conversion_worker_options()) as executor:
+            futures = [executor.submit(_convert_sama_file, path, skip_tasks if i == 0 else 0)
+                       for i, path in enumerate(paths)]
+            for future in futures:
+                num_tasks, records, task_hashes = future.result()
+                if self._task_hashes is not None:
+                    self._task_hashes.current.update(task_hashes)
+                self._snapshot_memory('conversion')
+                yield num_tasks, records
+
+    def _get_conversion_worker_options(self):
+        previous_task_hashes = None
+        if self._task_hashes is not None:
+            previous_task_hashes = self._task_hashes.previous
+        return (self.metadata, self.infer_schema, self._user_task_schema, self._task_schema,
+                previous_task_hashes, self.slow_task_report is not None)
+
+    def _convert_sama_tasks(self, elements):
+        """This method yields the TaskRecord of every task in delivery order
+
+        With num_workers > 1 the tasks are converted by a pool of processes, 
+        TASKS_PER_CHUNK tasks at a time with at most twice num_workers chunks
+        waiting, so a streamed delivery stays bounded in memory.
+        """
+        if self.num_workers <= 1:
+            for element in elements:
+                yield self._convert_sama_element(element)
+            return
+
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.num_workers, 
+                initializer=_init_conversion_worker, 
+                initargs=self._get_conversion_worker_options()) as executor:
+            pending = collections.deque()
+            elements = iter(elements)
+            while True:
+                chunk = list(itertools.islice(elements, TASKS_PER_CHUNK))
+                if chunk:
+                    pending.append(executor.submit(_convert_sama_tasks_chunk, chunk))
+                if pending and (not chunk or len(pending) >= 2 * self.num_workers):
+                    yield from pending.popleft().result()
+                if not chunk and not pending:
+                    return
+
+    def _prepare_task_schema(self, elements):
+        if self.infer_schema:
+            self._task_schema = self._infer_task_schema(elements)
+
+    def _infer_task_schema(self, elements):
+        """This method returns the TaskSchema followed by most of the given tasks
+
+        The keys of every field are found with the substring searches and the
+        most common key wins. The fields of the user task_schema are kept.
+        """
+        counters = {field: collections.Counter() for field in TaskSchema.FIELDS}
+        searches = [
+            ('url', Substring.HTTPS.value, SearchIn.VALUE.value),
+            ('width', Substring.WIDTH.value, SearchIn.KEY.value),
+            ('height', Substring.HEIGHT.value, SearchIn.KEY.value),
+        ]
+        for element in elements:
+            for field, substr, dictionary_item in searches:
+                try:
+                    key = self._search_substring_key(element['data'], substr, dictionary_item)
+                except (SAMADatasetImporterException, KeyError, TypeError):
+                    continue
+                counters[field][('data', key)] += 1
+
+            layers_key = self._get_answers_layers_key(element)
+            if layers_key is not None:
+                counters['layers'][('answers', layers_key)] += 1
+
+        schema = TaskSchema(**{
+            field: counter.most_common(1)[0][0] if counter else None
+            for field, counter in counters.items()})
+        if self._user_task_schema is not None:
+            schema = self._user_task_schema.merge(schema)
+
+        return schema
+
+    def _parse_sama_element(self, element):
+        """This method returns a tuple with the asset URL, the labels and the image dimensions of a task"""
+        return self._build_sample(self._convert_sama_element(element))
+
+    def _convert_sama_element(self, element):
+        """This method returns the TaskRecord of a task, made of plain values only"""
+        if element is None:
+            return None # Unchanged since the previous import
+        if self.slow_task_report is None:
+            return self._convert_sama_task(element)
+
+        start = time.perf_counter()
+        record = self._convert_sama_task(element)
+        seconds = time.perf_counter() - start
+        return record._replace(profile=(seconds, len(json.dumps(element))))
+
+    def _convert_sama_task(self, element):
+        context = self._build_task_context(element)
+        dimensions = self._get_image_dimensions(context)
+
+        if context.layers != None :
+            detections = self._get_detections_fields(context.layers, context)
+            scene_attributes = self._get_answer_scene_attributes(element)
+            return TaskRecord(context.url, dimensions, detections, scene_attributes, element.get('id'))
+
+        return TaskRecord(context.url, dimensions, None, {}, element.get('id'))
+
+    def _build_sample(self, record):
+        """This method returns a tuple with the asset URL, the labels and the image dimensions of a TaskRecord"""
+        return self._consume_record(record, self._build_sample_labels)
+
+    def _store_record(self, record):
+        """This method appends a TaskRecord to the annotation store and returns its row"""
+        return self._consume_record(record, self.annotation_store.append)
+
+    def _consume_record(self, record, consume=None):
+        """This method counts a TaskRecord and returns consume(record), or the record
+
+        When slow tasks are reported the time of consume is added to the 
+        conversion time of the task.
+        """
+        self.metrics.tasks_converted += 1
+        if record.detections is not None:
+            self.metrics.detections += len(record.detections)
+        if consume is None:
+            consume = _return_record
+        if self.slow_task_report is None or record.profile is None:
+            return consume(record)
+
+        start = time.perf_counter()
+        result = consume(record)
+        conversion_seconds, serialized_size = record.profile
+        self.slow_task_report.record(
+            conversion_seconds + time.perf_counter() - start, record.task_id, record.url,
+            len(record.detections or ()), serialized_size)
         return result
 
+    def _build_sample_labels(self, record):
+        if record.detections is None:
+            return record.url, {}, record.dimensions
+
+        detections = fo.Detections(
+            detections=[fo.Detection(**fields) for fields in record.detections])
+        return record.url, {'detections': detections, **record.scene_attributes}, record.dimensions
+
+    def _build_task_context(self, element):
+        """This method returns the TaskContext of a task
+
+        The answer layers, the asset URL and the image size are searched once
+        per task and the conversion helpers read them from the context. Tasks
+        that follow the TaskSchema of the delivery are read directly.
+        """
+        if self._task_schema is not None:
+            context = self._task_schema.build_context(element)
+            if context is not None:
+                return context
+
+        layers = self._get_answers_layers(element)
+        url = self._get_url(element)
+        try:
+            image_width, image_height = self._read_image_size(element)
+        except (SAMADatasetImporterException, TypeError, ValueError):
+            image_width, image_height = None, None
+
+        return TaskContext(element, url, layers, image_width, image_height)
+
+    def _read_image_size(self, element):
+        """This method returns a tuple (width, height) searched in the task data"""
+        # Get key values based on suffix "Width" and "Height"
+        image_height = int(self._search_substring_in_dictionary(element['data'], Substring.HEIGHT.value, SearchIn.KEY.value))
+        image_width = int(self._search_substring_in_dictionary(element['data'], Substring.WIDTH.value, SearchIn.KEY.value))
+        return image_width, image_height
+
+    def _get_task_image_size(self, element):
+        """This method returns the (width, height) of a TaskContext or of a raw task"""
+        if isinstance(element, TaskContext):
+            return element.get_image_size()
+        return self._read_image_size(element)
+
+    def _get_image_dimensions(self, context):
+        """This method returns a tuple (width, height) read from the task data
+
+        Returns None in 'fetch' mode or when the task data has no 
+        "Width" and "Height" fields, the asset is downloaded instead.
+        """
+        if self.metadata == MetadataMode.FETCH.value or not context.has_image_size():
+            return None
+
+        return context.get_image_size()
+
+    def _iter_sama_tasks(self, path, chunk_size=STREAM_CHUNK_SIZE):
+        """This method yields the tasks of a delivery file one at a time
+
+        The delivery is a JSON array of tasks. The file is read in chunks and 
+        every task is decoded as soon as it is complete, so only the current
+        task and one chunk are held in memory.
+        """
+        decoder = json.JSONDecoder()
+        with open(path, 'r', encoding='utf-8') as f:
+            buffer = f.read(chunk_size)
+            position = WHITESPACE.match(buffer).end()
+            while position == len(buffer):
+                # Leading whitespace may fill whole chunks
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                buffer = chunk
+                position = WHITESPACE.match(buffer).end()
+            if buffer[position:position + 1] != '[':
+                raise SAMADatasetImporterException(
+                    f'ERROR, the delivery {path} is not a list of tasks')
+            position += 1
+
+            while True:
+                position = WHITESPACE.match(buffer, position).end()
+                if position < len(buffer) and buffer[position] == ']':
+                    return
+                if position < len(buffer) and buffer[position] == ',':
+                    position += 1
+                    continue
+
+                try:
+                    if position == len(buffer):
+                        raise json.JSONDecodeError('Incomplete task', buffer, position)
+                    element, position = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    # The task continues in the next chunk. Growing the read 
+                    # with the buffer keeps big tasks from being decoded
+                    # over and over again
+                    chunk = f.read(max(chunk_size, len(buffer) - position))
+                    if not chunk:
+                        raise SAMADatasetImporterException(
+                            f'ERROR, the delivery {path} is truncated or malformed')
+                    buffer = buffer[position:] + chunk
+                    position = 0
+                    continue
+
+                if not isinstance(element, dict):
+                    raise SAMADatasetImporterException(
+                        f'ERROR, the delivery {path} is not a list of tasks')
+                yield element
+
+                if position >= chunk_size:
+                    buffer = buffer[position:]
+                    position = 0
+
     def _from_answer_to_detection(self,layers, element):
         """This method returns a valid detection dictionary
 
         Voxel51 provides fo.Detections class that converts 
-        the input data into a detection 
+        the input data into a detection. element is the TaskContext
+        of the task, or the raw task
         Reference: https://voxel51.com/docs/fiftyone/user_guide/using_datasets.html#object-detection
         """
+        result = [fo.Detection(**fields) for fields in self._get_detections_fields(layers, element)]
+        return {'detections': fo.Detections(detections=result)}
+
+    def _get_detections_fields(self, layers, element):
+        """This method returns a list with the fields of every fo.Detection of the answer"""
         result = []
         vectors = layers['layers']['vector_tagging']
-        for vector in vectors:
-            shapes = vector['shapes']
-            for shape in shapes:
-                tags = [{x:y} for x,y in shape['tags'].items()]
-                points = self._from_points_to_voxel51_bounding_box(shape['points'], element) 
-                label = list(shape['tags'].values())[0]
-                type = shape['type']
-                tags.append({"label": label})
-                tags.append({"bounding_box": points})
-                tags.append({"type": type})
-
-                aux = {**shape['tags'], **{"bounding_box": points}, **{'label':label}}
-                result.append(fo.Detection(**aux))
+        shapes = [shape for vector in vectors for shape in vector['shapes']]
+        if len(shapes) == 0:
+            return result
+
+        image_width, image_height = self._get_task_image_size(element)
+        bounding_boxes, valid = self._from_points_to_voxel51_bounding_boxes(
+            [shape['points'] for shape in shapes], image_width, image_height)
+        if not valid.all():
+            raise SAMADatasetImporterException(
+                f'ERROR, the rectangle points are not valid')
 
-        return {'detections': fo.Detections(detections=result)}
+        intern = self.vocabulary.intern
+        for shape, points in zip(shapes, bounding_boxes.tolist()):
+            aux = {intern(key): intern(value) for key, value in shape['tags'].items()}
+            label = list(aux.values())[0]
+            aux['bounding_box'] = points
+            aux['label'] = label
+            result.append(aux)
+
+        return result
 
 
 
@@ -140,10 +1105,11 @@ class SAMADatasetImporter(foud.LabeledImageDatasetImporter):
         The scene attributes describe qualities of the asset. It can be daytime,
         a place, asset quality etc.
         """
+        intern = self.vocabulary.intern
         result = {}
         for key,value in element['answers'].items():
             if not isinstance(value, dict):
-                result[key]=value
+                result[intern(key)] = intern(value)
         return result
         
     def _get_answers_layers(self, element):
@@ -170,16 +1136,26 @@ class SAMADatasetImporter(foud.LabeledImageDatasetImporter):
 
         # Is a platform project
         else:
-            print("ENTRA", element['answers'])
             # check answer is not empty
             if element['answers'] != {}:
                 answers = element['answers'].values()
                 return self._search_platform_layers(answers)           
             else:
-                print('ENTRA2')
                 return None
     
     
+    def _get_answers_layers_key(self, element):
+        """This method returns the key of the layers inside answers or None"""
+        answers = element.get('answers') or {}
+        if "_vector" in answers:
+            return "_vector"
+
+        for key, answer in answers.items():
+            if isinstance(answer, dict) and "layers" in answer:
+                return key
+
+        return None
+
     def _search_platform_layers(self, answers):
         """This method returns a dictionary with the answer
 
@@ -203,38 +1179,96 @@ class SAMADatasetImporter(foud.LabeledImageDatasetImporter):
 
         Sama annotation points follow the structure [[x1,y1],[x1,y2],[x2,y2],[x2,y1]]
         Voxel51 requires the format:[x1, y1, width , height]
+        element is the TaskContext of the task, or the raw task
         Reference: https://voxel51.com/docs/fiftyone/recipes/adding_detections.html?highlight=bounding%20box
         """
-       
-        # Get key values based on suffix "Width" and "Height"
-        image_height = int(self._search_substring_in_dictionary(element['data'], Substring.HEIGHT.value, SearchIn.KEY.value))
-        image_width = int(self._search_substring_in_dictionary(element['data'], Substring.WIDTH.value, SearchIn.KEY.value))
+        image_width, image_height = self._get_task_image_size(element)
 
-        rectangle = RectanglePoints(np.array(points))
+        rectangle = RectanglePoints(points)
 
-        top_left_x_point = rectangle.get_top_left_point().get_x()
-        top_left_y_point = rectangle.get_top_left_point().get_y()
-        bottom_right_x_point = rectangle.get_bottom_right_point().get_x()
-        bottom_right_y_point = rectangle.get_bottom_right_point().get_y()
+        # The top left point is (min x, max y) and the bottom right (max x, min y)
+        top_left_x_point = rectangle.get_min_x()
+        top_left_y_point = rectangle.get_max_y()
+        bottom_right_x_point = rectangle.get_max_x()
+        bottom_right_y_point = rectangle.get_min_y()
 
         relative_width = (bottom_right_x_point - top_left_x_point) / image_width
         relative_height = (bottom_right_y_point - top_left_y_point) / image_height
 
         return [ top_left_x_point/image_width, top_left_y_point/image_height, relative_width , relative_height ]
 
+    def _from_points_to_voxel51_bounding_boxes(self, points, image_width, image_height):
+        """This method returns the bounding boxes of many rectangles at once
+
+        The N rectangles are stacked in a (N, 4, 2) array and converted with a 
+        few numpy operations into a (N, 4) array of boxes with the same values
+        as _from_points_to_voxel51_bounding_box. image_width and image_height
+        are numbers, or arrays with one value per rectangle to convert the 
+        rectangles of a whole delivery together.
+
+        It also returns a (N,) mask of the valid rectangles, the boxes of the
+        rectangles that are not 4 finite points are NaN.
+        """
+        rectangles = self._stack_rectangle_points(points)
+        valid = np.isfinite(rectangles).all(axis=(1, 2))
+
+        min_points = rectangles.min(axis=1)
+        max_points = rectangles.max(axis=1)
+        image_width = np.asarray(image_width, dtype=np.float64)
+        image_height = np.asarray(image_height, dtype=np.float64)
+
+        # The top left point is (min x, max y) and the bottom right (max x, min y)
+        bounding_boxes = np.empty((len(rectangles), 4))
+        bounding_boxes[:, 0] = min_points[:, 0] / image_width
+        bounding_boxes[:, 1] = max_points[:, 1] / image_height
+        bounding_boxes[:, 2] = (max_points[:, 0] - min_points[:, 0]) / image_width
+        bounding_boxes[:, 3] = (min_points[:, 1] - max_points[:, 1]) / image_height
+
+        return bounding_boxes, valid
+
+    def _stack_rectangle_points(self, points):
+        """This method returns a (N, 4, 2) float array with the points of N rectangles
+
+        Shapes that are not 4 [x, y] points are filled with NaN.
+        """
+        try:
+            rectangles = np.asarray(points, dtype=np.float64)
+        except (TypeError, ValueError):
+            rectangles = None
+        if rectangles is not None and rectangles.ndim == 3 and rectangles.shape[1:] == (4, 2):
+            return rectangles
+
+        rectangles = np.full((len(points), 4, 2), np.nan)
+        for i, shape_points in enumerate(points):
+            try:
+                shape_points = np.asarray(shape_points, dtype=np.float64)
+            except (TypeError, ValueError):
+                continue
+            if shape_points.shape == (4, 2):
+                rectangles[i] = shape_points
+
+        return rectangles
+
         
     def _search_substring_in_dictionary(self, dictionary, substr, dictionary_item):
         """This method returns a string that contains a specific substring
 
+        dictionary_item specifies where to search the substring in a key or in a value
+        """
+        return dictionary[self._search_substring_key(dictionary, substr, dictionary_item)]
+
+    def _search_substring_key(self, dictionary, substr, dictionary_item):
+        """This method returns the key of the item that contains a specific substring
+
         dictionary_item specifies where to search the substring in a key or in a value
         """
         for  key, value in dictionary.items():
             if dictionary_item == 'value':
                 if substr in value:
-                    return value
+                    return key
             if dictionary_item == 'key':
                 if substr in key:
-                    return value
+                    return key
   
         raise SAMADatasetImporterException(
             f'ERROR, Task meta data does not contains the value')
@@ -242,6 +1276,238 @@ class SAMADatasetImporter(foud.LabeledImageDatasetImporter):
            
               
 
+class SAMADatasetExporter(foud.LabeledImageDatasetExporter):
+    """Export labeled image datasets as a SAMA delivery
+
+    The delivery is written one task at a time, so the memory used does not 
+    depend on the number of samples. Tasks follow the data/answers layout of
+    a Sama Platform project, which SAMADatasetImporter reads back. SAMA tasks
+    reference their assets by URL. The URL of a sample is read from the 
+    url_field of its labels, written by SAMADatasetImporter with 
+    sama_fields=True, or else rebuilt from its filepath, which FiftyOne 
+    stores as a local path like <cwd>/https:/host/a.jpg. The id of a task
+    is read from task_id_field, samples without one are numbered in export
+    order.
+
+    The exporter does not declare a label_cls: a sample is exported from a 
+    fo.Detections or from a dictionary of labels whose other values become 
+    scene attributes. label_field is therefore required when exporting a 
+    collection, e.g. 
+    view.export(dataset_type=CustomLabeledImageDataset, label_field={
+        'detections': 'detections', 'sama_url': 'sama_url', 
+        'sama_task_id': 'sama_task_id'})
+
+        Args:
+            export_dir (None): the directory to write the export
+            labels_path (None): the delivery JSON file. By default it is 
+                'delivery.json' inside export_dir
+            layers_key ('Image Annotation'): the answers key of the layers
+            url_field ('sama_url'): the key of the labels holding the asset
+                URL of a sample
+            task_id_field ('sama_task_id'): the key of the labels holding 
+                the id of the task of a sample
+            **kwargs: additional keyword arguments for your exporter
+    """
+
+    def __init__(
+        self,
+        export_dir=None,
+        labels_path=None,
+        layers_key=EXPORT_LAYERS_KEY,
+        url_field=SAMA_URL_FIELD,
+        task_id_field=SAMA_TASK_ID_FIELD,
+        **kwargs,
+    ):
+        super().__init__(export_dir=export_dir)
+        if labels_path is None:
+            if export_dir is None:
+                raise SAMADatasetImporterException(
+                    f'ERROR, export_dir or labels_path is required')
+            labels_path = os.path.join(self.export_dir, EXPORT_LABELS_FILENAME)
+        self.labels_path = labels_path
+        self.layers_key = layers_key
+        self.url_field = url_field
+        self.task_id_field = task_id_field
+        self._file = None
+        self._num_tasks = 0
+
+    @property
+    def requires_image_metadata(self):
+        return True # The image size turns boxes into pixel points
+
+    @property
+    def label_cls(self):
+        return None
+
+    def setup(self):
+        directory = os.path.dirname(self.labels_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.labels_path, 'w', encoding='utf-8')
+        self._file.write('[')
+        self._num_tasks = 0
+
+    def export_sample(self, image_or_path, label, metadata=None):
+        task = self._to_sama_task(image_or_path, label, metadata)
+        if self._num_tasks > 0:
+            self._file.write(',')
+        self._file.write('\n')
+        self._file.write(json.dumps(task))
+        self._num_tasks += 1
+
+    def close(self, *args):
+        if self._file is not None:
+            self._file.write('\n]\n')
+            self._file.close()
+            self._file = None
+
+    def _to_sama_task(self, image_or_path, label, metadata):
+        """This method returns the SAMA task of a sample
+
+        label is a fo.Detections or a dictionary of labels. Detections become 
+        rectangle shapes and the other values scene attributes, except the 
+        url_field and task_id_field.
+        """
+        if label is None:
+            label = {}
+        elif not isinstance(label, dict):
+            label = {'detections': label}
+        label = dict(label)
+        url = label.pop(self.url_field, None)
+        task_id = label.pop(self.task_id_field, None)
+
+        url = self._get_asset_url(image_or_path if url is None else url)
+        if metadata is None or metadata.width is None or metadata.height is None:
+            raise SAMADatasetImporterException(
+                f'ERROR, the sample {url} has no image metadata')
+        if task_id is None:
+            task_id = str(self._num_tasks)
+
+        detections = []
+        scene_attributes = {}
+        for key, value in label.items():
+            if isinstance(value, fo.Detections):
+                detections.extend(d for d in value.detections if d.bounding_box is not None)
+            elif isinstance(value, fo.Classification):
+                scene_attributes[key] = value.label
+            elif isinstance(value, (str, int, float, bool)):
+                scene_attributes[key] = value
+
+        answers = {}
+        if detections or scene_attributes:
+            shapes = self._to_sama_shapes(detections, metadata.width, metadata.height)
+            answers = {
+                **scene_attributes,
+                self.layers_key: {'layers': {'vector_tagging': [{'shapes': shapes}]}},
+            }
+
+        return {
+            'id': task_id,
+            'data': {
+                EXPORT_URL_KEY: url,
+                # Deliveries hold the image size as strings
+                EXPORT_HEIGHT_KEY: str(metadata.height),
+                EXPORT_WIDTH_KEY: str(metadata.width),
+            },
+            'answers': answers,
+        }
+
+    def _get_asset_url(self, filepath):
+        """This method returns the https URL of a sample filepath
+
+        The URL is rebuilt from the local path FiftyOne stores for it.
+        """
+        if isinstance(filepath, str) and urllib.parse.urlparse(filepath).scheme != 'https':
+            match = NORMALIZED_URL.search(filepath)
+            if match is not None:
+                filepath = f'https://{match.group(1)}'
+        if not isinstance(filepath, str) or urllib.parse.urlparse(filepath).scheme != 'https':
+            raise SAMADatasetImporterException(
+                f'ERROR, the sample {filepath} is not an https URL')
+        return filepath
+
+    def _to_sama_shapes(self, detections, image_width, image_height):
+        """This method returns the rectangle shapes of a list of fo.Detection"""
+        if len(detections) == 0:
+            return []
+
+        points = self._from_voxel51_bounding_boxes_to_points(
+            [detection.bounding_box for detection in detections], image_width, image_height)
+
+        shapes = []
+        for i, (detection, rectangle) in enumerate(zip(detections, points.tolist())):
+            tags = {
+                name: detection[name] for name in detection.field_names
+                if name not in type(detection)._fields}
+            if not tags:
+                tags = {EXPORT_LABEL_TAG: detection.label}
+            shapes.append({
+                'tags': tags,
+                'type': 'rectangle',
+                'index': detection.index if detection.index is not None else i + 1,
+                'points': rectangle,
+            })
+
+        return shapes
+
+    def _from_voxel51_bounding_boxes_to_points(self, bounding_boxes, image_width, image_height):
+        """This method returns a (N, 4, 2) array with the pixel points of N bounding boxes
+
+        It is the inverse of SAMADatasetImporter._from_points_to_voxel51_bounding_boxes.
+        Each box [x, y, width, height] becomes the corners
+        [[x1, y1], [x2, y1], [x1, y2], [x2, y2]] rounded to whole pixels.
+        """
+        boxes = np.asarray(bounding_boxes, dtype=np.float64).reshape(-1, 4)
+        size = np.array([image_width, image_height], dtype=np.float64)
+        first = boxes[:, 0:2] * size
+        second = (boxes[:, 0:2] + boxes[:, 2:4]) * size
+
+        points = np.empty((len(boxes), 4, 2))
+        points[:, 0] = first
+        points[:, 1, 0] = second[:, 0]
+        points[:, 1, 1] = first[:, 1]
+        points[:, 2, 0] = first[:, 0]
+        points[:, 2, 1] = second[:, 1]
+        points[:, 3] = second
+
+        return np.rint(points).astype(np.int64)
+
+
+def _return_record(record):
+    return record
+
+
+# Importer of each worker process, created by _init_conversion_worker
+_conversion_worker = None
+
+
+def _init_conversion_worker(metadata, infer_schema, user_task_schema, task_schema,
+                            previous_task_hashes, profile_tasks):
+    global _conversion_worker
+    # Workers only time the tasks, the report is kept by the importing process
+    _conversion_worker = SAMADatasetImporter(
+        metadata=metadata, infer_schema=infer_schema, slow_tasks=1 if profile_tasks else None)
+    _conversion_worker._user_task_schema = user_task_schema
+    _conversion_worker._task_schema = task_schema
+    if previous_task_hashes is not None:
+        _conversion_worker._task_hashes = TaskHashTable(previous_task_hashes)
+
+
+def _convert_sama_tasks_chunk(elements):
+    return [_conversion_worker._convert_sama_element(element) for element in elements]
+
+
+def _convert_sama_file(path, skip_tasks):
+    task_hashes = _conversion_worker._task_hashes
+    if task_hashes is not None:
+        task_hashes.current = {}
+    elements = list(_conversion_worker._filter_unchanged_tasks(
+        _conversion_worker._load_sama_tasks(path)))
+    records = [
+        _conversion_worker._convert_sama_element(element) for element in elements[skip_tasks:]]
+    return len(elements), records, task_hashes.current if task_hashes is not None else {}
+
+
 class CustomLabeledImageDataset(fot.LabeledImageDataset):
     
     """Custom labeled image dataset type."""
@@ -268,14 +1534,964 @@ class CustomLabeledImageDataset(fot.LabeledImageDataset):
             a :class:`fiftyone.utils.data.exporters.LabeledImageDatasetExporter`
             class
         """
-        # Return your custom LabeledImageDatasetExporter class here
+        return SAMADatasetExporter
+
+
+def import_sama_delivery_with_checkpoints(dataset, dataset_dir, batch_size=None, label_field=None,
+                                          tags=None, **kwargs):
+    """This function imports a SAMA delivery into a dataset and commits the checkpoint after every write
+
+    It is fo.Dataset.from_dir with CustomLabeledImageDataset for imports that
+    have to resume exactly: the same samples are written with 
+    dataset.add_samples, batched by the default batcher of the FiftyOne 
+    config unless batch_size is given, and it is not faster. With a 
+    checkpoint_path, the checkpoint is committed with the position of the last
+    sample of every written batch, so a resumed import neither loses nor 
+    duplicates samples.
+
+    Args:
+        dataset: the fo.Dataset where the samples are added
+        dataset_dir: the delivery file, directory or glob pattern
+        batch_size (None): a fixed number of samples per write
+        label_field (None): a prefix for the label fields, like from_dir
+        tags (None): tags added to every sample
+        **kwargs: the options of SAMADatasetImporter, except 
+            checkpoint_commits which is always True
+
+    Returns:
+        the list of the IDs of the added samples
+    """
+    if 'checkpoint_commits' in kwargs:
+        raise SAMADatasetImporterException(
+            f'ERROR, checkpoint_commits is set by import_sama_delivery_with_checkpoints')
+    batcher = None
+    if batch_size is not None:
+        batcher = functools.partial(fou.StaticBatcher, batch_size=batch_size)
+
+    sample_ids = []
+    with SAMADatasetImporter(dataset_dir=dataset_dir, checkpoint_commits=True, 
+                             **kwargs) as importer:
+        samples = (_to_fiftyone_sample(filepath, metadata, labels, label_field, tags)
+                   for filepath, metadata, labels in importer)
+        # Batchers may read samples ahead of the batch they write
+        for batch_ids in dataset.add_samples(
+                samples, batcher=batcher, generator=True, progress=False):
+            sample_ids.extend(batch_ids)
+            importer.commit_checkpoint(len(batch_ids))
+
+    return sample_ids
+
+
+def _to_fiftyone_sample(filepath, metadata, labels, label_field, tags):
+    sample = fo.Sample(filepath=filepath, metadata=metadata, tags=tags)
+    if labels:
+        if label_field is not None:
+            labels = {f'{label_field}_{key}': value for key, value in labels.items()}
+        sample.update_fields(labels)
+    return sample
+
+
+class AnnotationStore(object):
+    """Columnar store of the labels of a delivery
+
+    Every task is a row. The detections of all the rows sit in flat columns:
+    boxes is a (D, 4) array with the bounding boxes, label_codes a (D,) int32
+    array of codes in the vocabulary, and every tag is a column of detection 
+    indices and values, as most detections only have a few of the tags. The
+    detections of a row are offsets[row]:offsets[row + 1]. Tag keys, tag 
+    values and scene attributes are interned in the vocabulary, so every 
+    distinct string is kept once.
+
+    Rows are appended while parsing and freeze() turns the columns into numpy
+    arrays. The FiftyOne labels of a row are only built by get_labels().
+    """
+
+    def __init__(self, vocabulary=None):
+        self.vocabulary = vocabulary if vocabulary is not None else Vocabulary()
+        self.urls = []
+        self.task_ids = []
+        self.dimensions = []
+        self.scene_attributes = []
+        self._has_layers = bytearray()
+        self._offsets = array.array('i', [0])
+        self._boxes = array.array('d')
+        self._label_column = array.array('i')
+        self._tags = {}
+        self.offsets = None
+        self.boxes = None
+        self.label_codes = None
+        self.tags = None
+
+    def __len__(self):
+        return len(self.urls)
+
+    def append(self, record):
+        """This method adds the row of a TaskRecord and returns its index"""
+        row = len(self.urls)
+        self.urls.append(record.url)
+        self.task_ids.append(record.task_id)
+        self.dimensions.append(record.dimensions)
+        if record.detections is None:
+            self._has_layers.append(0)
+            self.scene_attributes.append(None)
+            self._offsets.append(self._offsets[-1])
+            return row
+
+        # Records converted by worker processes arrive with their own copies
+        intern = self.vocabulary.intern_always
+        self._has_layers.append(1)
+        self.scene_attributes.append(
+            {intern(key): intern(value) for key, value in record.scene_attributes.items()})
+        detection = self._offsets[-1]
+        for fields in record.detections:
+            self._boxes.extend(fields['bounding_box'])
+            self._label_column.append(self.vocabulary.encode(fields['label']))
+            for key, value in fields.items():
+                if key == 'bounding_box' or key == 'label':
+                    continue
+                indices, values = self._tags.setdefault(intern(key), (array.array('i'), []))
+                indices.append(detection)
+                values.append(intern(value))
+            detection += 1
+        self._offsets.append(detection)
+        return row
+
+    def freeze(self):
+        """This method exposes the columns as numpy arrays that share the memory of the buffers"""
+        self.offsets = np.frombuffer(self._offsets, dtype=np.int32)
+        self.boxes = np.frombuffer(self._boxes, dtype=np.float64).reshape(-1, 4)
+        self.label_codes = np.frombuffer(self._label_column, dtype=np.int32)
+        self.tags = {key: (np.frombuffer(indices, dtype=np.int32), values)
+                     for key, (indices, values) in self._tags.items()}
+
+    def get_labels(self, row):
+        """This method returns the labels dictionary of a row, like _build_sample"""
+        if not self._has_layers[row]:
+            return {}
+
+        start, end = self.offsets[row], self.offsets[row + 1]
+        fields = [{} for _ in range(end - start)]
+        for key, (indices, values) in self.tags.items():
+            first, last = np.searchsorted(indices, (start, end)).tolist()
+            for detection, value in zip(indices[first:last].tolist(), values[first:last]):
+                fields[detection - start][key] = value
+        labels = self.vocabulary.values
+        for detection_fields, box, code in zip(
+                fields, self.boxes[start:end].tolist(), self.label_codes[start:end].tolist()):
+            detection_fields['bounding_box'] = box
+            detection_fields['label'] = labels[code]
+
+        detections = fo.Detections(
+            detections=[fo.Detection(**detection_fields) for detection_fields in fields])
+        return {'detections': detections, **self.scene_attributes[row]}
+
+
+class Vocabulary(object):
+    """Interned strings with an integer code each
+
+    intern() returns the first copy seen of a string, so equal strings share
+    one object, and encode() its code, values[code] being the string. Other 
+    values are returned as they are by intern(). Once max_interned strings
+    are known intern() stops adding new ones, to keep streaming imports of 
+    free text bounded, while intern_always() and encode() always add them.
+    """
+
+    def __init__(self, max_interned=None):
+        self.max_interned = max_interned
+        self.values = []
+        self._codes = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def __contains__(self, value):
+        return self._key(value) in self._codes
+
+    def encode(self, value):
+        """This method returns the code of value, added to the vocabulary if needed"""
+        key = self._key(value)
+        code = self._codes.get(key)
+        if code is None:
+            code = self._codes[key] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def decode(self, code):
+        return self.values[code]
+
+    def get_code(self, value):
+        """This method returns the code of value, or None if it is not in the vocabulary"""
+        return self._codes.get(self._key(value))
+
+    def intern(self, value):
+        if type(value) is not str:
+            return value
+        code = self._codes.get(value)
+        if code is not None:
+            return self.values[code]
+        if self.max_interned is not None and len(self.values) >= self.max_interned:
+            return value
+        return self.values[self.encode(value)]
+
+    def intern_always(self, value):
+        if type(value) is not str:
+            return value
+        return self.values[self.encode(value)]
+
+    def _key(self, value):
+        # 1, 1.0 and True are equal dictionary keys, only strings are keyed by value
+        return value if type(value) is str else (type(value), value)
+
+
+class TaskSchema(object):
+    """Paths of the task fields shared by the tasks of a delivery
+
+    Every path is a tuple of keys, like ('data', 'Image'), so the fields of a
+    task are read with a few dictionary lookups instead of searching the keys.
+    """
+    FIELDS = ('url', 'width', 'height', 'layers')
+
+    def __init__(self, url=None, width=None, height=None, layers=None):
+        self.url = url
+        self.width = width
+        self.height = height
+        self.layers = layers
+
+    @classmethod
+    def from_mapping(cls, mapping):
+        """This method returns a TaskSchema from a dictionary of JMESPath-style expressions"""
+        unknown_fields = set(mapping) - set(cls.FIELDS)
+        if unknown_fields:
+            raise SAMADatasetImporterException(
+                f'ERROR, {sorted(unknown_fields)} are not valid task_schema fields')
+        return cls(**{field: cls.parse_path(expression) for field, expression in mapping.items()})
+
+    @staticmethod
+    def parse_path(expression):
+        """This method returns the tuple of keys of a JMESPath-style expression
+
+        Keys are separated by dots and keys with dots or spaces are quoted,
+        data."Annotation Width" is ('data', 'Annotation Width')
+        """
+        keys = []
+        position = 0
+        while True:
+            if expression.startswith('"', position):
+                end = expression.find('"', position + 1)
+                if end == -1:
+                    raise SAMADatasetImporterException(
+                        f'ERROR, {expression} is not a valid path')
+                keys.append(expression[position + 1:end])
+                position = end + 1
+            else:
+                end = expression.find('.', position)
+                end = len(expression) if end == -1 else end
+                key = expression[position:end].strip()
+                if not key:
+                    raise SAMADatasetImporterException(
+                        f'ERROR, {expression} is not a valid path')
+                keys.append(key)
+                position = end
+
+            if position == len(expression):
+                return tuple(keys)
+            if expression[position] != '.':
+                raise SAMADatasetImporterException(
+                    f'ERROR, {expression} is not a valid path')
+            position += 1
+
+    def merge(self, other):
+        """This method returns a TaskSchema with the paths of self, completed with the paths of other"""
+        return TaskSchema(**{
+            field: getattr(self, field) if getattr(self, field) is not None else getattr(other, field)
+            for field in self.FIELDS})
+
+    def build_context(self, element):
+        """This method returns the TaskContext of a task that follows the schema or None"""
+        if None in (self.url, self.width, self.height, self.layers):
+            return None
+
+        url = self._lookup(element, self.url)
+        if not isinstance(url, str) or Substring.HTTPS.value not in url:
+            return None
+
+        try:
+            image_width = int(self._lookup(element, self.width))
+            image_height = int(self._lookup(element, self.height))
+        except (TypeError, ValueError):
+            return None
+
+        layers = self._lookup(element, self.layers)
+        if layers is None:
+            # An empty answer has no layers
+            if element.get('answers') != {}:
+                return None
+        elif not isinstance(layers, dict) or 'layers' not in layers:
+            return None
+
+        return TaskContext(element, url, layers, image_width, image_height)
+
+    def _lookup(self, element, path):
+        value = element
+        for key in path:
+            try:
+                value = value[key]
+            except (KeyError, TypeError, IndexError):
+                return None
+        return value
+
+
+class TaskContext(object):
+    """Values of a task resolved once and shared by the conversion helpers"""
+
+    def __init__(self, element, url, layers, image_width=None, image_height=None):
+        self.element = element
+        self.url = url
+        self.layers = layers
+        self.image_width = image_width
+        self.image_height = image_height
+
+    def has_image_size(self):
+        return self.image_width is not None and self.image_height is not None
+
+    def get_image_size(self):
+        if not self.has_image_size():
+            raise SAMADatasetImporterException(
+                f'ERROR, Task meta data does not contains the value')
+        return self.image_width, self.image_height
+
+
+class Tracer(object):
+    """Base class of the tracers of SAMADatasetImporter
+
+    span() returns a context manager that times a block of code and hands it
+    to record(), which subclasses implement.
+    """
+
+    def span(self, name, **args):
+        return TraceSpan(self, name, args)
+
+    def record(self, name, start, duration, args):
+        raise NotImplementedError
+
+    def close(self):
         pass
 
-class Point():
+
+class TraceSpan(object):
+    """A block of code timed with time.perf_counter()"""
+
+    __slots__ = ('tracer', 'name', 'args', 'start')
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.tracer.record(self.name, self.start, time.perf_counter() - self.start, self.args)
+
+
+class CallbackTracer(Tracer):
+    """Tracer that calls callback(name, start, duration, args) for every span"""
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def record(self, name, start, duration, args):
+        self.callback(name, start, duration, args)
+
+
+class ChromeTracer(Tracer):
+    """Tracer that collects the spans as Chrome trace events
+
+    write() saves them in the JSON format read by chrome://tracing and 
+    https://ui.perfetto.dev. Spans of different threads get their own track.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.events = []
+        self._pid = os.getpid()
+
+    def record(self, name, start, duration, args):
+        # list.append is atomic, spans can be recorded from several threads
+        self.events.append({
+            'name': name,
+            'ph': 'X',
+            'ts': start * 1e6,
+            'dur': duration * 1e6,
+            'pid': self._pid,
+            'tid': threading.get_ident(),
+            'args': args,
+        })
+
+    def write(self, path=None):
+        with open(path or self.path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f)
+
+    def close(self):
+        if self.path is not None:
+            self.write()
+
+
+class ImportMetrics(object):
+    """Live counters of an import
+
+    samples is the iteration position, expected_samples the length of the 
+    importer, None until it is known. The rates are measured from the first
+    call to __iter__. The counters can be polled with snapshot() or written 
+    for Prometheus with write_prometheus().
+    """
+
+    PROMETHEUS_METRICS = (
+        ('samples', 'counter', 'Samples handed to FiftyOne'),
+        ('expected_samples', 'gauge', 'Samples of the delivery'),
+        ('tasks_converted', 'counter', 'Tasks converted to labels'),
+        ('detections', 'counter', 'Detections produced'),
+        ('errors', 'counter', 'Errors raised while iterating'),
+        ('samples_per_second', 'gauge', 'Samples handed to FiftyOne per second'),
+        ('metadata_cache_hit_ratio', 'gauge', 'Share of the metadata cache lookups that hit'),
+        ('eta_seconds', 'gauge', 'Estimated seconds until the import completes'),
+    )
+
+    def __init__(self, metadata_cache=None):
+        self.metadata_cache = metadata_cache
+        self.samples = 0
+        self.expected_samples = None
+        self.tasks_converted = 0
+        self.detections = 0
+        self.errors = 0
+        self._iteration_started = None
+
+    def start_iteration(self):
+        if self._iteration_started is None:
+            self._iteration_started = time.monotonic()
+
+    @property
+    def samples_per_second(self):
+        if self._iteration_started is None:
+            return None
+        elapsed = time.monotonic() - self._iteration_started
+        return self.samples / elapsed if elapsed > 0 else None
+
+    @property
+    def metadata_cache_hit_ratio(self):
+        if self.metadata_cache is None:
+            return None
+        lookups = self.metadata_cache.hits + self.metadata_cache.misses
+        return self.metadata_cache.hits / lookups if lookups else None
+
+    @property
+    def eta_seconds(self):
+        samples_per_second = self.samples_per_second
+        if self.expected_samples is None or not samples_per_second:
+            return None
+        return max(self.expected_samples - self.samples, 0) / samples_per_second
+
+    def snapshot(self):
+        """This method returns a dictionary with the current value of every metric"""
+        return {name: getattr(self, name) for name, _, _ in self.PROMETHEUS_METRICS}
+
+    def to_prometheus(self):
+        """This method returns the metrics in the Prometheus text format, unknown ones are left out"""
+        lines = []
+        for name, metric_type, description in self.PROMETHEUS_METRICS:
+            value = getattr(self, name)
+            if value is None:
+                continue
+            metric = f'sama_import_{name}' + ('_total' if metric_type == 'counter' else '')
+            lines.append(f'# HELP {metric} {description}')
+            lines.append(f'# TYPE {metric} {metric_type}')
+            lines.append(f'{metric} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        # The textfile collector may read the file at any time, replace it at once
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(temp_path, path)
+
+
+class SlowTaskReport(object):
+    """The slowest tasks of an import
+
+    Only the size slowest tasks are kept, in a heap, so recording a task is
+    cheap and the memory does not grow with the delivery. Each entry has the
+    task id, the asset URL, the seconds spent converting the task, its number
+    of shapes and its serialized size in bytes.
+    """
+
+    def __init__(self, size=DEFAULT_SLOW_TASKS):
+        self.size = size
+        self.num_tasks = 0
+        self.total_seconds = 0.0
+        self._heap = []
+        self._order = itertools.count()
+
+    def record(self, seconds, task_id, url, num_shapes, serialized_size):
+        self.num_tasks += 1
+        self.total_seconds += seconds
+        if len(self._heap) == self.size and seconds <= self._heap[0][0]:
+            return
+
+        entry = (seconds, next(self._order), {
+            'id': task_id,
+            'url': url,
+            'seconds': seconds,
+            'num_shapes': num_shapes,
+            'serialized_size': serialized_size,
+        })
+        if len(self._heap) < self.size:
+            heapq.heappush(self._heap, entry)
+        else:
+            heapq.heapreplace(self._heap, entry)
+
+    def top(self):
+        """This method returns the entries of the slowest tasks, slowest first"""
+        return [task for _, _, task in sorted(self._heap, reverse=True)]
+
+    def to_dict(self):
+        """This method returns the report with the share of the total time of each task"""
+        tasks = [{**task, 'share': task['seconds'] / self.total_seconds if self.total_seconds else 0.0}
+                 for task in self.top()]
+        return {'num_tasks': self.num_tasks, 'total_seconds': self.total_seconds, 'tasks': tasks}
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+class MemoryProfiler(object):
+    """Allocation snapshots taken with tracemalloc after each stage of an import
+
+    Each snapshot is compared with the previous one, so the size of a stage
+    is the memory it allocated and kept alive, and its peak the most memory
+    traced while it ran, temporary objects included. Stages with the same 
+    name, like the stages of every delivery file, are added up.
+    """
+
+    def __init__(self, top=DEFAULT_MEMORY_TOP):
+        self.top = top
+        self.stages = {}
+        self._previous = None
+        self._started_tracing = False
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._previous = self._take_snapshot()
+        tracemalloc.reset_peak()
+
+    def snapshot(self, stage):
+        """This method adds the allocations since the previous snapshot to stage"""
+        snapshot = self._take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        stats = snapshot.compare_to(self._previous, 'lineno')
+        entry = self.stages.setdefault(
+            stage, {'size_diff': 0, 'peak': 0, 'sites': collections.Counter()})
+        entry['size_diff'] += sum(stat.size_diff for stat in stats)
+        entry['peak'] = max(entry['peak'], peak)
+        for stat in stats:
+            entry['sites'][str(stat.traceback[0])] += stat.size_diff
+
+        self._previous = snapshot
+        tracemalloc.reset_peak()
+
+    @property
+    def started(self):
+        return self._previous is not None
+
+    def stop(self):
+        self._previous = None
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def report(self, num_tasks, num_detections):
+        """This method returns the text report with the top allocation sites of every stage"""
+        lines = [f'{num_tasks} tasks, {num_detections} detections']
+        for stage, entry in self.stages.items():
+            size_diff = entry['size_diff']
+            per_task = size_diff / num_tasks if num_tasks else 0
+            per_detection = size_diff / num_detections if num_detections else 0
+            lines.append('')
+            lines.append(
+                f'{stage}: {size_diff / 2**20:+.1f} MiB, peak {entry["peak"] / 2**20:.1f} MiB, '
+                f'{per_task:+.0f} B/task, {per_detection:+.0f} B/detection')
+            top_sites = sorted(entry['sites'].items(), key=lambda site: abs(site[1]), reverse=True)
+            for site, site_size_diff in top_sites[:self.top]:
+                lines.append(f'    {site_size_diff / 2**10:+12.1f} KiB  {site}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path, num_tasks, num_detections):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.report(num_tasks, num_detections))
+
+    def _take_snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        ))
+
+
+class ImportCheckpoint(object):
+    """Progress of an import saved in a JSON file
+
+    The file holds a hash of the delivery files and the position (file index,
+    task index and task id) of the last task imported. By default it is 
+    written every flush_every samples with the position of the previous 
+    write, so samples that FiftyOne may still hold in a write batch are 
+    imported again after a crash instead of being lost. With explicit_commits
+    it is only written by commit(), with the exact position of the last 
+    sample the caller knows is written. close() saves the last position.
+    """
+
+    def __init__(self, path, delivery_hash, flush_every=DEFAULT_CHECKPOINT_EVERY,
+                 explicit_commits=False):
+        self.path = path
+        self.delivery_hash = delivery_hash
+        self.flush_every = flush_every
+        self.explicit_commits = explicit_commits
+        self.num_samples = 0
+        self._imported_samples = 0
+        self._committed_samples = 0
+        self._pending = collections.deque()
+        self._latest = None
+        self._trailing = None
+
+    def load(self):
+        """This method returns the (file index, task index) where the import resumes"""
+        if not os.path.exists(self.path):
+            return 0, 0
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state['delivery_hash'] != self.delivery_hash:
+            raise SAMADatasetImporterException(
+                f'ERROR, the checkpoint {self.path} belongs to a different delivery')
+
+        self.num_samples = state['num_samples']
+        return state['file_index'], state['task_index'] + 1
+
+    def update(self, position):
+        """This method records the position of a sample handed to FiftyOne"""
+        self._imported_samples += 1
+        self._latest = position
+        if self.explicit_commits:
+            self._pending.append(position)
+            return
+        if self._imported_samples % self.flush_every == 0:
+            if self._trailing is not None:
+                self._write(*self._trailing)
+            self._trailing = (position, self._imported_samples)
+
+    def commit(self, num_samples=None):
+        """This method saves the position of the next num_samples samples recorded, known to be written
+
+        By default every sample recorded so far is written.
+        """
+        if num_samples is None:
+            num_samples = len(self._pending)
+        if num_samples <= 0:
+            return
+        for _ in range(num_samples - 1):
+            self._pending.popleft()
+        self._committed_samples += num_samples
+        self._write(self._pending.popleft(), self._committed_samples)
+
+    def close(self, completed=True):
+        if completed and self._latest is not None:
+            self._write(self._latest, self._imported_samples)
+
+    def _write(self, position, imported_samples):
+        file_index, task_index, task_id = position
+        state = {
+            'delivery_hash': self.delivery_hash,
+            'file_index': file_index,
+            'task_index': task_index,
+            'task_id': task_id,
+            'num_samples': self.num_samples + imported_samples,
+        }
+        # Replace the file at once so a crash never leaves half a checkpoint
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.path)
+
+    @staticmethod
+    def hash_delivery(paths):
+        """This method returns the SHA-256 of the names and contents of the delivery files"""
+        digest = hashlib.sha256()
+        for path in paths:
+            digest.update(os.path.basename(path).encode('utf-8'))
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(STREAM_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+        return digest.hexdigest()
+
+
+class TaskHashTable(object):
+    """Content hashes of the tasks of a delivery keyed by task id
+
+    previous holds the hashes saved by the last import and current the hashes
+    of the tasks read so far. A task is changed when its hash differs from the
+    previous one. Tasks without an id are always imported.
+    """
+
+    def __init__(self, previous=None, path=None):
+        self.path = path
+        self.previous = previous if previous is not None else {}
+        self.current = {}
+
+    @classmethod
+    def load(cls, path):
+        """This method returns the TaskHashTable saved in path, empty if the file does not exist"""
+        previous = None
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+        return cls(previous, path=path)
+
+    def filter(self, element):
+        """This method returns the task if it is new or changed, None otherwise"""
+        task_id = element.get('id')
+        if task_id is None:
+            return element
+
+        task_id = str(task_id)
+        task_hash = self.hash_task(element)
+        self.current[task_id] = task_hash
+        if self.previous.get(task_id) == task_hash:
+            return None
+        return element
+
+    def changed_task_ids(self):
+        """This method returns the sorted ids of the previous tasks read with another hash"""
+        return sorted(task_id for task_id, task_hash in self.current.items()
+                      if self.previous.get(task_id, task_hash) != task_hash)
+
+    def deleted_task_ids(self):
+        """This method returns the sorted ids of the previous tasks that were not read"""
+        return sorted(self.previous.keys() - self.current.keys())
+
+    def save(self, resumed=False):
+        """This method writes the current hashes to path
+
+        A resumed import did not read the tasks before its checkpoint, so the
+        previous hashes are kept for them.
+        """
+        task_hashes = self.current
+        if resumed:
+            task_hashes = {**self.previous, **self.current}
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(task_hashes, f)
+        os.replace(temp_path, self.path)
+
+    @staticmethod
+    def hash_task(element):
+        """This method returns a hash of the answers of a task that ignores key order"""
+        answers = json.dumps(
+            element.get('answers'), sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        return hashlib.blake2b(answers.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class ImageMetadataFetcher(object):
+    """Downloads the ImageMetadata of assets on a bounded thread pool
+
+    All the threads share one requests.Session, so the connections to the
+    asset server are kept alive and reused, up to max_workers at a time.
+    """
+
+    def __init__(self, max_workers=DEFAULT_METADATA_WORKERS, timeout=DEFAULT_FETCH_TIMEOUT):
+        self._timeout = timeout
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+        self._session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=max_workers, pool_maxsize=max_workers)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+    def submit(self, url):
+        """This method returns a Future of the ImageMetadata of the asset"""
+        return self._executor.submit(self.fetch, url)
+
+    def fetch(self, url):
+        """This method returns the ImageMetadata of the asset
+
+        The whole asset is read so the connection goes back to the pool.
+        Local paths are delegated to ImageMetadata.build_for
+        """
+        if not url.startswith('http'):
+            return fom.ImageMetadata.build_for(url)
+
+        with self._session.get(url, timeout=self._timeout) as response:
+            response.raise_for_status()
+            content = response.content
+            mime_type = response.headers.get('Content-Type') or mimetypes.guess_type(url)[0]
+
+        width, height, num_channels = fom.get_image_info(io.BytesIO(content))
+        return fom.ImageMetadata(
+            size_bytes=len(content),
+            mime_type=mime_type,
+            width=width,
+            height=height,
+            num_channels=num_channels)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self._session.close()
+
+
+class ImageMetadataCache(object):
+    """Two-tier cache of ImageMetadata keyed by canonical asset URL
+
+    An in-memory LRU sits in front of an optional SQLite file. The file can be
+    shared between importers and processes. Its size is checked every 
+    CACHE_EVICTION_INTERVAL writes and once it holds more than 
+    max_disk_entries the least recently used assets are evicted.
+
+    Args:
+        path (None): the SQLite file. By default only the memory tier is used
+        max_memory_entries (10000): the size cap of the memory tier
+        max_disk_entries (1000000): the size cap of the SQLite file
+    """
+
+    def __init__(self, path=None, max_memory_entries=DEFAULT_CACHE_MEMORY_ENTRIES,
+                 max_disk_entries=DEFAULT_CACHE_DISK_ENTRIES):
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._connection = None
+        self._writes_since_eviction = 0
+        if path is not None:
+            self._connection = sqlite3.connect(
+                path, timeout=DEFAULT_FETCH_TIMEOUT, isolation_level=None,
+                check_same_thread=False)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS image_metadata ('
+                'url TEXT PRIMARY KEY, width INTEGER, height INTEGER, '
+                'size_bytes INTEGER, mime_type TEXT, num_channels INTEGER, '
+                'accessed REAL)')
+            self._connection.execute(
+                'CREATE INDEX IF NOT EXISTS image_metadata_accessed '
+                'ON image_metadata (accessed)')
+
+    @property
+    def hits(self):
+        return self.memory_hits + self.disk_hits
+
+    def get(self, url):
+        """This method returns the cached ImageMetadata of the asset or None"""
+        key = self.canonical_url(url)
+        with self._lock:
+            fields = self._memory.get(key)
+            if fields is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return fom.ImageMetadata(**fields)
+
+            if self._connection is not None:
+                row = self._connection.execute(
+                    'SELECT width, height, size_bytes, mime_type, num_channels '
+                    'FROM image_metadata WHERE url = ?', (key,)).fetchone()
+                if row is not None:
+                    self._connection.execute(
+                        'UPDATE image_metadata SET accessed = ? WHERE url = ?',
+                        (time.time(), key))
+                    fields = dict(zip(
+                        ('width', 'height', 'size_bytes', 'mime_type', 'num_channels'), row))
+                    self._remember(key, fields)
+                    self.disk_hits += 1
+                    return fom.ImageMetadata(**fields)
+
+            self.misses += 1
+            return None
+
+    def put(self, url, metadata):
+        """This method stores the ImageMetadata of the asset in both tiers"""
+        key = self.canonical_url(url)
+        fields = {
+            'width': metadata.width,
+            'height': metadata.height,
+            'size_bytes': metadata.size_bytes,
+            'mime_type': metadata.mime_type,
+            'num_channels': metadata.num_channels,
+        }
+        with self._lock:
+            self._remember(key, fields)
+            if self._connection is not None:
+                self._connection.execute(
+                    'INSERT OR REPLACE INTO image_metadata VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (key, fields['width'], fields['height'], fields['size_bytes'],
+                     fields['mime_type'], fields['num_channels'], time.time()))
+                self._writes_since_eviction += 1
+                if self._writes_since_eviction >= CACHE_EVICTION_INTERVAL:
+                    self._evict_from_disk()
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    @staticmethod
+    def canonical_url(url):
+        """This method returns the URL that identifies an asset across deliveries
+
+        Scheme and host are lower-cased, the fragment is dropped and so are 
+        the signing parameters of pre-signed URLs, which change every delivery.
+        """
+        parts = urllib.parse.urlsplit(url)
+        query = [(key, value) for key, value in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+                 if not key.lower().startswith(SIGNED_URL_PARAMETERS)]
+        return urllib.parse.urlunsplit((
+            parts.scheme.lower(), parts.netloc.lower(), parts.path, 
+            urllib.parse.urlencode(sorted(query)), ''))
+
+    def _remember(self, key, fields):
+        self._memory[key] = fields
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_from_disk(self):
+        self._writes_since_eviction = 0
+        count = self._connection.execute('SELECT COUNT(*) FROM image_metadata').fetchone()[0]
+        if count > self.max_disk_entries:
+            self._connection.execute(
+                'DELETE FROM image_metadata WHERE url IN ('
+                'SELECT url FROM image_metadata ORDER BY accessed LIMIT ?)',
+                (count - self.max_disk_entries,))
+
+
+class Point(object):
+    __slots__ = ('x', 'y')
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
 
+    def __eq__(self, other):
+        if not isinstance(other, Point):
+            return NotImplemented
+        return self.x == other.x and self.y == other.y
+
+    def __hash__(self):
+        return hash((self.x, self.y))
+
     def get_x(self):
         return self.x
     
@@ -286,8 +2502,10 @@ class Points(object):
     """Wrapper around np arrays that represent annotation points.
     """
 
+    __slots__ = ('_coordinates',)
+
     def __init__(self, coordinates):
-        self._coordinates = coordinates
+        self._coordinates = np.asarray(coordinates)
 
     def __eq__(self, other):
         return self._coordinates.tolist() == other._coordinates.tolist()
@@ -297,21 +2515,19 @@ class Points(object):
 
 class VectorPoints(Points):
     """Abstract class for vector shapes
-    It calculates the max and min points over axis
-    take() is a numpy function for get an specific index from a np.array
+    It calculates the max and min points over axis with one numpy reduction
+    per bound over the (N, 2) coordinates array
     """
 
+    __slots__ = ('_min_x', '_max_x', '_min_y', '_max_y')
+
     def __init__(self, coordinates):
         super().__init__(coordinates)
-        if len(self.get_coordinates()) == 0:
+        if self._coordinates.size == 0:
             raise SAMADatasetImporterException(
                 f'ERROR, the shape has empty coordinates')
-        all_x = [np.take(x, 0) for x in self.get_coordinates()]
-        all_y = [np.take(x, 1) for x in self.get_coordinates()]
-        self._min_x = min(all_x)
-        self._max_x = max(all_x)
-        self._min_y = min(all_y)
-        self._max_y = max(all_y)
+        self._min_x, self._min_y = self._coordinates.min(axis=0).tolist()
+        self._max_x, self._max_y = self._coordinates.max(axis=0).tolist()
 
     def get_max_x(self):
         return self._max_x
@@ -329,6 +2545,8 @@ class VectorPoints(Points):
 class RectanglePoints(VectorPoints):
     """This class have only the points of a rectangle"""
 
+    __slots__ = ()
+
     def __init__(self, coordinates):
         super().__init__(coordinates)
         if len(self.get_coordinates()) != 4:
@@ -1,3 +1,4 @@
+import json
 import os
 import sys
 
@@ -9,7 +10,92 @@ from sama import(
     SAMADatasetImporter,
     SAMADatasetImporterException,
     Substring,
-    SearchIn)
+    SearchIn,
+    DuplicateUrl,
+    MetadataMode,
+    ImageMetadataFetcher,
+    ImageMetadataCache,
+    TaskContext,
+    TaskSchema,
+    SAMADatasetExporter,
+    CustomLabeledImageDataset,
+    DeliveryFile,
+    TaskRecord,
+    ImportCheckpoint,
+    TaskHashTable,
+    Tracer,
+    ChromeTracer,
+    ImportMetrics,
+    SlowTaskReport,
+    MemoryProfiler,
+    AnnotationStore,
+    Vocabulary,
+    import_sama_delivery_with_checkpoints,
+    SCHEMA_SAMPLE_SIZE)
 
 sys.path.insert(
     0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+RECTANGLE_POINTS = [[67, 199], [254, 199], [67, 433], [254, 433]]
+
+
+def asset_url(i):
+    return f"https://asset.samasource.org/{i}.jpg"
+
+
+def asset_urls(ids):
+    return [asset_url(i) for i in ids]
+
+
+def make_task(i, url=None, task_id=None, num_shapes=1, points=RECTANGLE_POINTS,
+              scene_attributes=None, empty_answers=False, size=(1280, 720)):
+    """Returns a Sama Platform task of the asset i, of the given size, with num_shapes rectangles
+
+    num_shapes=0 gives answers with empty layers and empty_answers=True gives
+    no answers at all. size=None leaves the image size out of the task data.
+    """
+    task = {
+        "id": str(i) if task_id is None else task_id,
+        "data": {"Image": asset_url(i) if url is None else url},
+        "answers": {},
+    }
+    if size is not None:
+        width, height = size
+        task["data"]["Annotation Height"] = str(height)
+        task["data"]["Annotation Width"] = str(width)
+    if empty_answers:
+        return task
+
+    vector_tagging = []
+    if num_shapes:
+        vector_tagging = [{
+            "shapes": [{
+                "tags": {"Vehicle": "other_vehicle"},
+                "type": "rectangle",
+                "index": 1,
+                "points": points
+            }] * num_shapes
+        }]
+    task["answers"] = {
+        **(scene_attributes or {}),
+        "Image Annotation": {"layers": {"vector_tagging": vector_tagging}},
+    }
+    return task
+
+
+def write_delivery(path, tasks, indent=None):
+    """Writes the tasks as a delivery file and returns its path as a string"""
+    path.write_text(json.dumps(tasks, indent=indent))
+    return str(path)
+
+
+def import_filepaths(dataSetImporter, num_samples=None):
+    """Imports at most num_samples samples and returns their filepaths"""
+    dataSetImporter.setup()
+    filepaths = []
+    for filepath, _, _ in iter(dataSetImporter):
+        filepaths.append(filepath)
+        if len(filepaths) == num_samples:
+            break
+    dataSetImporter.close()
+    return filepaths
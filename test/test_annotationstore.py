@@ -0,0 +1,98 @@
+import json
+
+import numpy as np
+
+from .context import (SAMADatasetImporter,
+                      AnnotationStore)
+
+
+def _shape(tags, points):
+    return {"tags": tags, "type": "rectangle", "index": 1, "points": points}
+
+
+DATA = [
+    {
+        "id": "001",
+        "data": {
+            "Image": "https://asset.samasource.org/1.jpg",
+            "Annotation Height": "720",
+            "Annotation Width": "1280"
+        },
+        "answers": {
+            "Time of day": "day",
+            "Image Annotation": {"layers": {"vector_tagging": [{"shapes": [
+                _shape({"Vehicle": "car"}, [[67, 199], [254, 199], [67, 433], [254, 433]]),
+                _shape({"Person": "rider", "Occluded": "yes"},
+                       [[10, 20], [30, 20], [10, 40], [30, 40]]),
+            ]}]}}
+        },
+    },
+    {
+        "id": "002",
+        "data": {"Image": "https://asset.samasource.org/2.jpg"},
+        "answers": {},
+    },
+    {
+        "id": "003",
+        "data": {
+            "Image": "https://asset.samasource.org/3.jpg",
+            "Annotation Height": "1080",
+            "Annotation Width": "1920"
+        },
+        "answers": {
+            "Time of day": "night",
+            "Image Annotation": {"layers": {"vector_tagging": [{"shapes": [
+                _shape({"Vehicle": "car"}, [[100, 100], [200, 100], [100, 300], [200, 300]]),
+            ]}]}}
+        },
+    },
+]
+
+
+def _comparable(labels):
+    """This method returns the labels with every detection as a dictionary without its id"""
+    if "detections" not in labels:
+        return labels
+    detections = [{name: detection[name] for name in detection.field_names if name != "id"}
+                  for detection in labels["detections"].detections]
+    return {**labels, "detections": detections}
+
+
+def _setup_importer(tmp_path, **kwargs):
+    path = tmp_path / "delivery.json"
+    path.write_text(json.dumps(DATA))
+    dataSetImporter = SAMADatasetImporter(dataset_dir=str(path), **kwargs)
+    dataSetImporter.setup()
+    return dataSetImporter
+
+
+def test_store_columns(tmp_path):
+    store = _setup_importer(tmp_path).annotation_store
+
+    assert len(store) == 3
+    assert store.offsets.tolist() == [0, 2, 2, 3]
+    assert store.boxes.shape == (3, 4)
+    assert [store.vocabulary.decode(code) for code in store.label_codes] == ["car", "rider", "car"]
+    assert store.tags["Vehicle"][0].tolist() == [0, 2]
+    assert store.tags["Occluded"] == (np.array([1]), ["yes"])
+    assert store.dimensions == [(1280, 720), None, (1920, 1080)]
+
+
+def test_store_labels_match_streaming_labels(tmp_path):
+    dataSetImporter = _setup_importer(tmp_path)
+    streamingImporter = _setup_importer(tmp_path, streaming=True)
+
+    for url, labels, dimensions in streamingImporter._iter_sample_labels():
+        assert _comparable(dataSetImporter._get_sample_labels(url)) == _comparable(labels)
+        assert dataSetImporter._get_sample_dimensions(url) == dimensions
+
+
+def test_labels_are_built_on_demand():
+    store = AnnotationStore()
+    dataSetImporter = SAMADatasetImporter()
+    store.append(dataSetImporter._convert_sama_element(DATA[0]))
+    store.freeze()
+
+    first, second = store.get_labels(0), store.get_labels(0)
+    assert _comparable(first) == _comparable(second)
+    assert first["detections"] is not second["detections"]
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+from .context import (SAMADatasetImporter,
+                      SAMADatasetImporterException,
+                      ImportCheckpoint,
+                      asset_urls,
+                      import_filepaths,
+                      make_task,
+                      write_delivery)
+
+
+@pytest.fixture
+def delivery_dir(tmp_path):
+    deliveries = {
+        "2022-06-07_delivery.json": [make_task(i, num_shapes=0) for i in range(3)],
+        "2022-06-08_delivery.json": [make_task(i, num_shapes=0) for i in range(3, 5)],
+    }
+    directory = tmp_path / "delivery"
+    directory.mkdir()
+    for name, tasks in deliveries.items():
+        write_delivery(directory / name, tasks)
+    return directory
+
+
+def _import(delivery_dir, checkpoint_path, num_samples=None, **kwargs):
+    dataSetImporter = SAMADatasetImporter(
+        dataset_dir=str(delivery_dir), checkpoint_path=str(checkpoint_path), **kwargs)
+    return import_filepaths(dataSetImporter, num_samples)
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_resume_import_after_checkpoint(delivery_dir, tmp_path, streaming):
+    checkpoint_path = tmp_path / "checkpoint.json"
+
+    assert _import(delivery_dir, checkpoint_path, 4, streaming=streaming) == asset_urls(range(4))
+    state = json.loads(checkpoint_path.read_text())
+    assert (state["file_index"], state["task_index"], state["task_id"]) == (1, 0, "3")
+    assert state["num_samples"] == 4
+
+    assert _import(delivery_dir, checkpoint_path, streaming=streaming) == asset_urls([4])
+    assert json.loads(checkpoint_path.read_text())["num_samples"] == 5
+
+    assert _import(delivery_dir, checkpoint_path, streaming=streaming) == []
+
+
+def test_resume_with_the_checkpoint_in_the_delivery_directory(delivery_dir):
+    checkpoint_path = delivery_dir / "checkpoint.json"
+
+    assert _import(delivery_dir, checkpoint_path, 4) == asset_urls(range(4))
+    assert _import(delivery_dir, checkpoint_path) == asset_urls([4])
+
+
+def test_checkpoint_trails_by_one_flush():
+    positions = [(0, i, str(i)) for i in range(5)]
+    checkpoint = ImportCheckpoint("unused", "hash", flush_every=2)
+    written = []
+    checkpoint._write = lambda position, imported_samples: written.append(position)
+
+    for position in positions:
+        checkpoint.update(position)
+    assert written == [positions[1]]
+
+    checkpoint.close(completed=False)
+    assert written == [positions[1]]
+    checkpoint.close()
+    assert written == [positions[1], positions[4]]
+
+
+def test_checkpoint_explicit_commits():
+    positions = [(0, i, str(i)) for i in range(5)]
+    checkpoint = ImportCheckpoint("unused", "hash", flush_every=2, explicit_commits=True)
+    written = []
+    checkpoint._write = lambda position, imported_samples: written.append((position, imported_samples))
+
+    for position in positions[:3]:
+        checkpoint.update(position)
+    assert written == []
+    checkpoint.commit()
+    assert written == [(positions[2], 3)]
+
+    for position in positions[3:]:
+        checkpoint.update(position)
+    checkpoint.close(completed=False)
+    assert written == [(positions[2], 3)]
+
+
+def test_checkpoint_of_another_delivery(delivery_dir, tmp_path):
+    checkpoint_path = tmp_path / "checkpoint.json"
+    _import(delivery_dir, checkpoint_path, 2)
+    write_delivery(delivery_dir / "2022-06-08_delivery.json", [make_task(5, num_shapes=0)])
+
+    with pytest.raises(SAMADatasetImporterException):
+        _import(delivery_dir, checkpoint_path)
@@ -0,0 +1,130 @@
+import fiftyone as fo
+import fiftyone.core.utils as fou
+import pytest
+
+from .context import (import_sama_delivery_with_checkpoints,
+                      SAMADatasetImporterException,
+                      make_task,
+                      write_delivery)
+
+
+SCENE_ATTRIBUTES = {"Time of day": "day"}
+
+
+class RecordingDataset(object):
+    """In-memory stand-in for fo.Dataset that records the batches of add_samples
+
+    The samples are batched by the FiftyOne batchers, like fo.Dataset does.
+    """
+
+    def __init__(self):
+        self.batches = []
+
+    def add_samples(self, samples, batcher=None, generator=False, progress=None):
+        batches = fou.get_default_batcher(samples, batcher=batcher, progress=progress)
+
+        def add_batches():
+            with batches:
+                for batch in batches:
+                    yield self._add_batch(batch)
+
+        if generator:
+            return add_batches()
+        return [sample_id for batch_ids in add_batches() for sample_id in batch_ids]
+
+    def _add_batch(self, batch):
+        first_id = sum(len(batch) for batch in self.batches)
+        self.batches.append(batch)
+        return [str(first_id + i) for i in range(len(batch))]
+
+
+class FailingDataset(RecordingDataset):
+    """RecordingDataset whose write number fail_at raises, like a crashed import"""
+
+    def __init__(self, fail_at):
+        super().__init__()
+        self.fail_at = fail_at
+        self.num_writes = 0
+
+    def _add_batch(self, batch):
+        self.num_writes += 1
+        if self.num_writes == self.fail_at:
+            raise RuntimeError("crash")
+        return super()._add_batch(batch)
+
+
+def _names(dataset):
+    # fo.Sample turns the URLs into local paths, the names stay
+    return [sample.filepath.rsplit("/", 1)[1] for batch in dataset.batches for sample in batch]
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_resume_import_does_not_duplicate_samples(tmp_path, streaming):
+    path = tmp_path / "delivery.json"
+    write_delivery(path, [make_task(i, scene_attributes=SCENE_ATTRIBUTES) for i in range(14)])
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+    dataset = FailingDataset(fail_at=3)
+
+    with pytest.raises(RuntimeError):
+        import_sama_delivery_with_checkpoints(
+            dataset, str(path), batch_size=4, streaming=streaming,
+            checkpoint_path=checkpoint_path, checkpoint_every=3)
+    import_sama_delivery_with_checkpoints(
+        dataset, str(path), batch_size=4, streaming=streaming,
+        checkpoint_path=checkpoint_path, checkpoint_every=3)
+
+    assert [len(batch) for batch in dataset.batches] == [4, 4, 4, 2]
+    assert sorted(_names(dataset)) == sorted(f"{i}.jpg" for i in range(14))
+
+
+def test_resume_import_with_a_batcher_that_reads_ahead(tmp_path, monkeypatch):
+    # The content size batcher reads the first sample of the next batch
+    monkeypatch.setattr(fo.config, "default_batcher", "size")
+    monkeypatch.setattr(fo.config, "batcher_target_size_bytes", 1)
+    path = tmp_path / "delivery.json"
+    write_delivery(path, [make_task(i, scene_attributes=SCENE_ATTRIBUTES) for i in range(6)])
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+    dataset = FailingDataset(fail_at=3)
+
+    with pytest.raises(RuntimeError):
+        import_sama_delivery_with_checkpoints(dataset, str(path), checkpoint_path=checkpoint_path)
+    import_sama_delivery_with_checkpoints(dataset, str(path), checkpoint_path=checkpoint_path)
+
+    assert _names(dataset) == [f"{i}.jpg" for i in range(6)]
+
+
+def test_import_with_the_default_batcher(tmp_path, monkeypatch):
+    monkeypatch.setattr(fo.config, "default_batcher", "static")
+    monkeypatch.setattr(fo.config, "batcher_static_size", 3)
+    path = tmp_path / "delivery.json"
+    write_delivery(path, [make_task(i, scene_attributes=SCENE_ATTRIBUTES) for i in range(5)])
+    dataset = RecordingDataset()
+
+    assert import_sama_delivery_with_checkpoints(dataset, str(path)) == ["0", "1", "2", "3", "4"]
+    assert [len(batch) for batch in dataset.batches] == [3, 2]
+
+
+def test_import_in_batches(tmp_path):
+    path = tmp_path / "delivery.json"
+    write_delivery(path, [make_task(i, scene_attributes=SCENE_ATTRIBUTES) for i in range(5)])
+    dataset = RecordingDataset()
+
+    sample_ids = import_sama_delivery_with_checkpoints(
+        dataset, str(path), batch_size=2, label_field="sama", tags=["delivery"])
+
+    assert sample_ids == ["0", "1", "2", "3", "4"]
+    assert [len(batch) for batch in dataset.batches] == [2, 2, 1]
+    sample = dataset.batches[0][0]
+    assert sample.tags == ["delivery"]
+    assert sample.metadata.width == 1280
+    assert sample["sama_Time of day"] == "day"
+    assert sample["sama_detections"].detections[0].label == "other_vehicle"
+
+
+def test_checkpoint_commits_cannot_be_set(tmp_path):
+    path = tmp_path / "delivery.json"
+    write_delivery(path, [make_task(0)])
+
+    with pytest.raises(SAMADatasetImporterException):
+        import_sama_delivery_with_checkpoints(
+            RecordingDataset(), str(path), checkpoint_commits=False)
@@ -0,0 +1,106 @@
+import pytest
+
+from .context import (SAMADatasetImporter,
+                      SAMADatasetImporterException,
+                      DeliveryFile,
+                      asset_urls,
+                      make_task,
+                      write_delivery)
+
+
+def _task(i, time_of_day=None):
+    return make_task(i, num_shapes=0, scene_attributes={"Time of day": time_of_day or f"day {i}"})
+
+
+@pytest.fixture
+def delivery_dir(tmp_path):
+    deliveries = {
+        "2022-06-07_delivery.json": [_task(0), _task(1)],
+        "2022-06-09_delivery.json": [_task(4)],
+        "2022-06-08_delivery.json": [_task(2), _task(3), _task(1)],
+    }
+    for name, tasks in deliveries.items():
+        write_delivery(tmp_path / name, tasks)
+    (tmp_path / "notes.txt").write_text("not a delivery")
+    return tmp_path
+
+
+def _urls(dataSetImporter):
+    return [url for url, _, _ in dataSetImporter._iter_sample_labels()]
+
+
+EXPECTED_URLS = asset_urls(range(5))
+
+
+@pytest.mark.parametrize("num_workers", [1, 2])
+def test_import_directory_of_deliveries(delivery_dir, num_workers):
+    dataSetImporter = SAMADatasetImporter(dataset_dir=str(delivery_dir), num_workers=num_workers)
+    dataSetImporter.setup()
+
+    assert len(dataSetImporter) == 5
+    assert _urls(dataSetImporter) == EXPECTED_URLS
+    assert dataSetImporter.manifest == [
+        DeliveryFile(str(delivery_dir / "2022-06-07_delivery.json"), 2),
+        DeliveryFile(str(delivery_dir / "2022-06-08_delivery.json"), 3),
+        DeliveryFile(str(delivery_dir / "2022-06-09_delivery.json"), 1),
+    ]
+
+
+def test_import_glob_of_deliveries(delivery_dir):
+    dataSetImporter = SAMADatasetImporter(dataset_dir=str(delivery_dir / "2022-06-0[78]_*.json"))
+    dataSetImporter.setup()
+
+    assert _urls(dataSetImporter) == EXPECTED_URLS[:4]
+
+
+def test_stream_directory_of_deliveries(delivery_dir):
+    dataSetImporter = SAMADatasetImporter(dataset_dir=str(delivery_dir), streaming=True)
+    dataSetImporter.setup()
+
+    assert [f.num_tasks for f in dataSetImporter.manifest] == [None, None, None]
+    assert _urls(dataSetImporter) == EXPECTED_URLS
+    assert [f.num_tasks for f in dataSetImporter.manifest] == [2, 3, 1]
+
+
+def test_later_delivery_overrides_labels(delivery_dir):
+    write_delivery(delivery_dir / "2022-06-10_delivery.json", [_task(0, "night")])
+    dataSetImporter = SAMADatasetImporter(dataset_dir=str(delivery_dir), duplicate_urls='last')
+    dataSetImporter.setup()
+
+    assert dataSetImporter._get_sample_labels(EXPECTED_URLS[0])["Time of day"] == "night"
+
+
+def test_empty_directory(tmp_path):
+    dataSetImporter = SAMADatasetImporter(dataset_dir=str(tmp_path))
+
+    with pytest.raises(SAMADatasetImporterException):
+        dataSetImporter.setup()
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_state_files_in_the_directory_are_not_deliveries(delivery_dir, streaming):
+    options = dict(
+        checkpoint_path=str(delivery_dir / "checkpoint.json"),
+        delta_path=str(delivery_dir / "delta.json"),
+        slow_tasks_path=str(delivery_dir / "slow_tasks.json"),
+        tracer=str(delivery_dir / "trace.json"))
+    for _ in range(2):
+        dataSetImporter = SAMADatasetImporter(
+            dataset_dir=str(delivery_dir), streaming=streaming, **options)
+        dataSetImporter.setup()
+        urls = [url for url, _, _ in iter(dataSetImporter)]
+        dataSetImporter.close()
+
+    assert (delivery_dir / "delta.json").exists()
+    assert len(dataSetImporter.manifest) == 3
+    assert urls == [] # Nothing changed since the first import
+
+
+def test_delivery_that_is_not_a_list(tmp_path):
+    (tmp_path / "delivery.json").write_text('{"id": "0"}')
+    dataSetImporter = SAMADatasetImporter(dataset_dir=str(tmp_path))
+
+    with pytest.raises(SAMADatasetImporterException) as exception:
+        dataSetImporter.setup()
+
+    assert 'not a list of tasks' in str(exception.value)
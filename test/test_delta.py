@@ -0,0 +1,107 @@
+import pytest
+
+from .context import (SAMADatasetImporter,
+                      TaskHashTable,
+                      asset_url,
+                      asset_urls,
+                      import_filepaths,
+                      make_task,
+                      write_delivery)
+
+
+def _task(i, time_of_day="day"):
+    return make_task(i, num_shapes=0, scene_attributes={"Time of day": time_of_day})
+
+
+def _import(delivery_dir, delta_path, **kwargs):
+    dataSetImporter = SAMADatasetImporter(
+        dataset_dir=str(delivery_dir), delta_path=str(delta_path), **kwargs)
+    return import_filepaths(dataSetImporter), dataSetImporter.deleted_task_ids
+
+
+@pytest.mark.parametrize("options", [
+    {},
+    {"streaming": True},
+    {"num_workers": 2},
+])
+def test_import_only_changed_tasks(tmp_path, options):
+    delivery_dir = tmp_path / "delivery"
+    delivery_dir.mkdir()
+    delta_path = tmp_path / "hashes.json"
+    write_delivery(delivery_dir / "2022-06-07_delivery.json", [_task(0), _task(1)])
+    write_delivery(delivery_dir / "2022-06-08_delivery.json", [_task(2), _task(3)])
+
+    assert _import(delivery_dir, delta_path, **options) == (asset_urls(range(4)), [])
+
+    write_delivery(delivery_dir / "2022-06-07_delivery.json", [_task(0), _task(1, "night")])
+    write_delivery(delivery_dir / "2022-06-08_delivery.json", [_task(3), _task(4)])
+
+    assert _import(delivery_dir, delta_path, **options) == (asset_urls([1, 4]), ["2"])
+    assert _import(delivery_dir, delta_path, **options) == ([], [])
+
+
+def test_changed_task_ids(tmp_path):
+    delivery_path = tmp_path / "delivery.json"
+    delta_path = tmp_path / "hashes.json"
+    write_delivery(delivery_path, [_task(0), _task(1)])
+    _import(delivery_path, delta_path)
+
+    write_delivery(delivery_path, [_task(0, "night"), _task(1), _task(2)])
+    dataSetImporter = SAMADatasetImporter(dataset_dir=str(delivery_path), delta_path=str(delta_path))
+    with dataSetImporter:
+        urls = [url for url, _, _ in dataSetImporter]
+
+    assert urls == asset_urls([0, 2])
+    assert dataSetImporter.changed_task_ids == ["0"]
+
+
+class MergingDataset(object):
+    """In-memory stand-in for fo.Dataset.merge_importer keyed on a sample field"""
+
+    def __init__(self):
+        self.samples = {}
+
+    def merge_importer(self, dataset_importer, key_field="filepath"):
+        assert key_field == "filepath"
+        with dataset_importer:
+            for filepath, _, labels in dataset_importer:
+                self.samples[filepath] = labels
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_merge_delta_keyed_on_filepath(tmp_path, streaming):
+    delivery_path = tmp_path / "delivery.json"
+    delta_path = str(tmp_path / "hashes.json")
+    dataset = MergingDataset()
+    write_delivery(delivery_path, [_task(0), _task(1)])
+    dataset.merge_importer(SAMADatasetImporter(
+        dataset_dir=str(delivery_path), delta_path=delta_path, streaming=streaming))
+
+    write_delivery(delivery_path, [_task(0), _task(1, "night")])
+    dataset.merge_importer(SAMADatasetImporter(
+        dataset_dir=str(delivery_path), delta_path=delta_path, streaming=streaming))
+
+    assert sorted(dataset.samples) == asset_urls([0, 1])
+    assert dataset.samples[asset_url(0)]["Time of day"] == "day"
+    assert dataset.samples[asset_url(1)]["Time of day"] == "night"
+
+
+def test_hash_ignores_key_order():
+    task = _task(0)
+    reordered = dict(task, answers=dict(reversed(list(task["answers"].items()))))
+
+    assert TaskHashTable.hash_task(task) == TaskHashTable.hash_task(reordered)
+    assert TaskHashTable.hash_task(task) != TaskHashTable.hash_task(_task(0, "night"))
+
+
+def test_hashes_are_not_saved_before_the_import_completes(tmp_path):
+    delivery_path = tmp_path / "delivery.json"
+    write_delivery(delivery_path, [_task(0), _task(1)])
+    delta_path = tmp_path / "hashes.json"
+
+    dataSetImporter = SAMADatasetImporter(dataset_dir=str(delivery_path), delta_path=str(delta_path))
+    dataSetImporter.setup()
+    next(iter(dataSetImporter))
+    dataSetImporter.close()
+
+    assert not delta_path.exists()
@@ -0,0 +1,54 @@
+import numpy as np
+
+from .context import (SAMADatasetImporter)
+
+RECTANGLES = [
+    [[67, 199], [254, 199], [67, 433], [254, 433]],
+    [[200, 600], [200, 200], [800, 200], [800, 600]],
+]
+
+DATA = {
+    "data": {
+        "Annotation Height": "720",
+        "Annotation Width": "1280"
+    }
+}
+
+
+def test_batch_matches_single_shape_conversion():
+    dataSetImporter = SAMADatasetImporter()
+    bounding_boxes, valid = dataSetImporter._from_points_to_voxel51_bounding_boxes(
+        RECTANGLES, 1280, 720)
+
+    expected_bounding_boxes = [
+        dataSetImporter._from_points_to_voxel51_bounding_box(points, DATA)
+        for points in RECTANGLES]
+
+    assert bounding_boxes.tolist() == expected_bounding_boxes
+    assert valid.tolist() == [True, True]
+
+
+def test_batch_with_dimensions_per_rectangle():
+    dataSetImporter = SAMADatasetImporter()
+    bounding_boxes, _ = dataSetImporter._from_points_to_voxel51_bounding_boxes(
+        RECTANGLES, np.array([1280, 1000]), np.array([720, 1000]))
+
+    assert bounding_boxes[1].tolist() == [0.2, 0.6, 0.6, -0.4]
+
+
+def test_batch_flags_non_valid_rectangles():
+    dataSetImporter = SAMADatasetImporter()
+    bounding_boxes, valid = dataSetImporter._from_points_to_voxel51_bounding_boxes(
+        [RECTANGLES[0], [[2, 3], [1, 1], [3, 1]], []], 1280, 720)
+
+    assert valid.tolist() == [True, False, False]
+    assert np.isnan(bounding_boxes[1:]).all()
+
+
+def test_batch_without_rectangles():
+    dataSetImporter = SAMADatasetImporter()
+    bounding_boxes, valid = dataSetImporter._from_points_to_voxel51_bounding_boxes(
+        [], 1280, 720)
+
+    assert bounding_boxes.shape == (0, 4)
+    assert valid.shape == (0,)
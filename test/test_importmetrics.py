@@ -0,0 +1,53 @@
+from .context import (SAMADatasetImporter,
+                      ImageMetadataCache,
+                      ImportMetrics,
+                      make_task,
+                      write_delivery)
+
+
+def test_poll_metrics_while_importing(tmp_path):
+    delivery_path = tmp_path / "delivery.json"
+    write_delivery(delivery_path, [make_task(i, num_shapes=num_shapes)
+                                   for i, num_shapes in enumerate([2, 1, 0])])
+    dataSetImporter = SAMADatasetImporter(dataset_dir=str(delivery_path))
+    dataSetImporter.setup()
+    samples = iter(dataSetImporter)
+
+    next(samples)
+    snapshot = dataSetImporter.metrics.snapshot()
+    assert snapshot["samples"] == 1
+    assert snapshot["expected_samples"] == len(dataSetImporter) == 3
+    assert snapshot["tasks_converted"] == 3
+    assert snapshot["detections"] == 3
+    assert snapshot["errors"] == 0
+    assert snapshot["eta_seconds"] >= 0
+    assert snapshot["metadata_cache_hit_ratio"] is None
+
+    next(samples), next(samples)
+    assert dataSetImporter.metrics.samples == 3
+    assert dataSetImporter.metrics.eta_seconds == 0
+
+
+def test_write_prometheus_textfile(tmp_path):
+    delivery_path = tmp_path / "delivery.json"
+    write_delivery(delivery_path, [make_task(0, num_shapes=1)])
+    metrics_path = tmp_path / "sama_import.prom"
+    dataSetImporter = SAMADatasetImporter(
+        dataset_dir=str(delivery_path), streaming=True, metrics_path=str(metrics_path))
+    dataSetImporter.setup()
+    list(iter(dataSetImporter))
+    dataSetImporter.close()
+
+    lines = metrics_path.read_text().splitlines()
+    assert "# TYPE sama_import_samples_total counter" in lines
+    assert "sama_import_samples_total 1" in lines
+    assert "sama_import_detections_total 1" in lines
+    # The length of a streaming import is unknown
+    assert not any(line.startswith("sama_import_eta_seconds") for line in lines)
+
+
+def test_metadata_cache_hit_ratio():
+    cache = ImageMetadataCache()
+    cache.memory_hits, cache.misses = 3, 1
+
+    assert ImportMetrics(metadata_cache=cache).metadata_cache_hit_ratio == 0.75
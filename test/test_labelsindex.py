@@ -0,0 +1,59 @@
+import pytest
+
+from .context import (SAMADatasetImporter,
+                      SAMADatasetImporterException,
+                      DuplicateUrl,
+                      make_task,
+                      write_delivery)
+
+
+DATA = [
+    make_task(1, task_id="001", num_shapes=0, scene_attributes={"Time of day": "day"}),
+    make_task(2, task_id="002", num_shapes=0, scene_attributes={"Time of day": "night"}),
+    make_task(1, task_id="003", num_shapes=0, scene_attributes={"Time of day": "dusk"}),
+]
+
+
+def _setup_importer(tmp_path, **kwargs):
+    path = write_delivery(tmp_path / "delivery.json", DATA)
+    dataSetImporter = SAMADatasetImporter(dataset_dir=path, **kwargs)
+    dataSetImporter.setup()
+    return dataSetImporter
+
+
+def test_labels_index_keeps_delivery_order(tmp_path):
+    dataSetImporter = _setup_importer(tmp_path)
+
+    assert len(dataSetImporter) == 2
+    assert dataSetImporter._filenames == [
+        "https://asset.samasource.org/1.jpg",
+        "https://asset.samasource.org/2.jpg"]
+
+
+def test_duplicate_url_keeps_first_labels(tmp_path):
+    dataSetImporter = _setup_importer(tmp_path)
+    labels = dataSetImporter._get_sample_labels(
+        "https://asset.samasource.org/1.jpg")
+
+    assert labels["Time of day"] == "day"
+
+
+def test_duplicate_url_keeps_last_labels(tmp_path):
+    dataSetImporter = _setup_importer(
+        tmp_path, duplicate_urls=DuplicateUrl.LAST.value)
+    labels = dataSetImporter._get_sample_labels(
+        "https://asset.samasource.org/1.jpg")
+
+    assert labels["Time of day"] == "dusk"
+
+
+def test_duplicate_url_error(tmp_path):
+    with pytest.raises(SAMADatasetImporterException) as exception:
+        _setup_importer(tmp_path, duplicate_urls=DuplicateUrl.ERROR.value)
+
+    assert 'delivered more than once' in str(exception.value)
+
+
+def test_non_valid_duplicate_url_option():
+    with pytest.raises(SAMADatasetImporterException):
+        SAMADatasetImporter(duplicate_urls='merge')
@@ -0,0 +1,36 @@
+import pytest
+
+from .context import (SAMADatasetImporter,
+                      AnnotationStore,
+                      TaskRecord,
+                      make_task,
+                      write_delivery)
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_labels_are_built_when_a_sample_is_returned(tmp_path, monkeypatch, streaming):
+    path = tmp_path / "delivery.json"
+    write_delivery(path, [make_task(i) for i in range(5)])
+    built = []
+    build_sample_labels = SAMADatasetImporter._build_sample_source_labels
+
+    def counting_build(self, sample_source):
+        built.append(sample_source)
+        return build_sample_labels(self, sample_source)
+
+    monkeypatch.setattr(SAMADatasetImporter, "_build_sample_source_labels", counting_build)
+    dataSetImporter = SAMADatasetImporter(
+        dataset_dir=str(path), streaming=streaming, metadata_workers=1)
+    dataSetImporter.setup()
+    assert built == []
+
+    samples = iter(dataSetImporter)
+    _, _, labels = next(samples)
+    # The next sample is already waiting for its metadata, without labels
+    assert len(built) == 1
+    assert labels["detections"].detections[0].label == "other_vehicle"
+    if streaming:
+        assert isinstance(built[0], TaskRecord)
+    else:
+        assert built[0] == 0
+        assert isinstance(dataSetImporter.annotation_store, AnnotationStore)
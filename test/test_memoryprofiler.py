@@ -0,0 +1,50 @@
+import tracemalloc
+
+from .context import (SAMADatasetImporter,
+                      MemoryProfiler,
+                      make_task,
+                      write_delivery)
+
+TASK = make_task(1, task_id="001")
+
+
+def test_memory_profile_report(tmp_path):
+    delivery_path = write_delivery(tmp_path / "delivery.json", [TASK])
+    profile_path = tmp_path / "memory.txt"
+    dataSetImporter = SAMADatasetImporter(
+        dataset_dir=delivery_path, memory_profile_path=str(profile_path))
+    dataSetImporter.setup()
+    list(iter(dataSetImporter))
+    dataSetImporter.close()
+
+    assert list(dataSetImporter.memory_profiler.stages) == [
+        "json_load", "conversion", "annotation_store", "samples_index", "iteration"]
+    report = profile_path.read_text()
+    assert report.startswith("1 tasks, 1 detections")
+    assert "B/detection" in report
+    assert not tracemalloc.is_tracing()
+
+
+def test_memory_profile_of_stopped_import(tmp_path):
+    delivery_path = write_delivery(tmp_path / "delivery.json", [TASK, TASK, TASK])
+    profile_path = tmp_path / "memory.txt"
+    dataSetImporter = SAMADatasetImporter(
+        dataset_dir=delivery_path, streaming=True, memory_profile_path=str(profile_path))
+    with dataSetImporter:
+        samples = iter(dataSetImporter)
+        next(samples)
+
+    assert not tracemalloc.is_tracing()
+    assert list(dataSetImporter.memory_profiler.stages) == ["iteration"]
+    assert "\niteration: " in profile_path.read_text()
+
+
+def test_profiler_measures_kept_allocations():
+    profiler = MemoryProfiler()
+    profiler.start()
+    kept = [bytearray(1000) for _ in range(100)]
+    profiler.snapshot("allocate")
+    profiler.stop()
+
+    assert profiler.stages["allocate"]["size_diff"] >= 100 * 1000
+    assert len(kept) == 100
@@ -0,0 +1,89 @@
+import fiftyone.core.metadata as fom
+
+from .context import (SAMADatasetImporter,
+                      ImageMetadataCache,
+                      ImageMetadataFetcher,
+                      MetadataMode,
+                      make_task,
+                      write_delivery)
+
+URL = "https://asset.samasource.org/asset01.jpg"
+METADATA = fom.ImageMetadata(
+    width=1280, height=720, size_bytes=1024, mime_type="image/jpeg", num_channels=3)
+
+
+def test_memory_cache_hit_and_miss():
+    cache = ImageMetadataCache()
+
+    assert cache.get(URL) is None
+    cache.put(URL, METADATA)
+    metadata = cache.get(URL)
+
+    assert (metadata.width, metadata.height, metadata.size_bytes) == (1280, 720, 1024)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = ImageMetadataCache(max_memory_entries=2)
+    cache.put(URL + "?1", METADATA)
+    cache.put(URL + "?2", METADATA)
+    cache.get(URL + "?1")
+    cache.put(URL + "?3", METADATA)
+
+    assert cache.get(URL + "?2") is None
+    assert cache.get(URL + "?1") is not None
+
+
+def test_disk_cache_is_shared(tmp_path):
+    path = str(tmp_path / "metadata.sqlite")
+    writer = ImageMetadataCache(path=path)
+    writer.put(URL, METADATA)
+    writer.close()
+
+    reader = ImageMetadataCache(path=path)
+    metadata = reader.get(URL)
+    reader.close()
+
+    assert metadata.mime_type == "image/jpeg"
+    assert reader.disk_hits == 1
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setattr("sama.CACHE_EVICTION_INTERVAL", 1)
+    cache = ImageMetadataCache(
+        path=str(tmp_path / "metadata.sqlite"), max_memory_entries=0, max_disk_entries=2)
+    for i in range(3):
+        cache.put(f"{URL}?{i}", METADATA)
+
+    assert cache.get(f"{URL}?0") is None
+    assert cache.get(f"{URL}?2") is not None
+
+
+def test_canonical_url_ignores_signature():
+    signed = "HTTPS://Asset.SamaSource.org/asset01.jpg?X-Amz-Signature=abc&X-Amz-Expires=60#top"
+
+    assert ImageMetadataCache.canonical_url(signed) == URL
+
+
+def test_importer_consults_cache(tmp_path, monkeypatch):
+    fetched_urls = []
+
+    def fetch(self, url):
+        fetched_urls.append(url)
+        return METADATA
+
+    monkeypatch.setattr(ImageMetadataFetcher, "fetch", fetch)
+    path = write_delivery(tmp_path / "delivery.json", [
+        make_task(1, url=URL, task_id="001", empty_answers=True, size=None)])
+    cache = ImageMetadataCache()
+
+    for _ in range(2):
+        dataSetImporter = SAMADatasetImporter(
+            dataset_dir=path, metadata=MetadataMode.FETCH.value, metadata_cache=cache)
+        dataSetImporter.setup()
+        samples = list(iter(dataSetImporter))
+        dataSetImporter.close()
+
+    assert fetched_urls == [URL]
+    assert samples[0][1].width == 1280
+    assert (cache.hits, cache.misses) == (1, 1)
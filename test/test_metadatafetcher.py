@@ -0,0 +1,94 @@
+import io
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PIL import Image
+
+from .context import (SAMADatasetImporter,
+                      ImageMetadataFetcher,
+                      MetadataMode)
+
+
+class AssetHandler(BaseHTTPRequestHandler):
+    """Serves a PNG of the size requested in the path, /https/<width>_<height>.png"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            server.connections.add(self.client_address)
+        time.sleep(0.01)
+
+        width, height = map(int, re.findall(r'\d+', self.path))
+        content = io.BytesIO()
+        Image.new('RGB', (width, height)).save(content, format='PNG')
+        body = content.getvalue()
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with server.lock:
+            server.in_flight -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def asset_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), AssetHandler)
+    server.lock = threading.Lock()
+    server.in_flight = 0
+    server.max_in_flight = 0
+    server.connections = set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _url(server, width, height):
+    # Task URLs are found by their "https" substring
+    return f'http://127.0.0.1:{server.server_port}/https/{width}_{height}.png'
+
+
+def test_fetch_image_metadata(asset_server):
+    fetcher = ImageMetadataFetcher(max_workers=1)
+    metadata = fetcher.fetch(_url(asset_server, 32, 16))
+    fetcher.close()
+
+    assert metadata.width == 32
+    assert metadata.height == 16
+    assert metadata.num_channels == 3
+    assert metadata.mime_type == 'image/png'
+    assert metadata.size_bytes > 0
+
+
+def test_fetched_metadata_keeps_delivery_order(tmp_path, asset_server):
+    sizes = [(10 + i, 20 + i) for i in range(24)]
+    data = [{
+        "id": str(i),
+        "data": {"Image": _url(asset_server, width, height)},
+        "answers": {},
+    } for i, (width, height) in enumerate(sizes)]
+    path = tmp_path / "delivery.json"
+    path.write_text(json.dumps(data))
+
+    dataSetImporter = SAMADatasetImporter(
+        dataset_dir=str(path), metadata=MetadataMode.FETCH.value, metadata_workers=4)
+    dataSetImporter.setup()
+    samples = list(iter(dataSetImporter))
+    dataSetImporter.close()
+
+    assert [(m.width, m.height) for _, m, _ in samples] == sizes
+    assert 1 < asset_server.max_in_flight <= 4
+    assert len(asset_server.connections) <= 4
@@ -0,0 +1,33 @@
+import pytest
+
+from .context import (SAMADatasetImporter,
+                      make_task,
+                      write_delivery)
+
+
+def _task(i):
+    # Varied answers, boxes and scene attributes, so the order is checked
+    return make_task(
+        i, points=[[i, 199], [254, 199], [i, 433], [254, 433]],
+        scene_attributes={"Time of day": "day" if i % 2 else "night"},
+        empty_answers=i % 7 == 0)
+
+
+def _samples(dataSetImporter):
+    return [(url, labels.get('Time of day'),
+             [d.bounding_box for d in labels['detections'].detections] if labels else None,
+             dimensions)
+            for url, labels, dimensions in dataSetImporter._iter_sample_labels()]
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_parallel_parsing_keeps_delivery_order(tmp_path, monkeypatch, streaming):
+    monkeypatch.setattr("sama.TASKS_PER_CHUNK", 3)
+    path = write_delivery(tmp_path / "delivery.json", [_task(i) for i in range(50)])
+
+    sequential = SAMADatasetImporter(dataset_dir=path, streaming=streaming)
+    sequential.setup()
+    parallel = SAMADatasetImporter(dataset_dir=path, streaming=streaming, num_workers=2)
+    parallel.setup()
+
+    assert _samples(parallel) == _samples(sequential)
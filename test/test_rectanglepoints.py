@@ -48,3 +48,16 @@ def test_triangle_rectangle():
     assert 'details: ERROR, the rectangle points are not valid' == str(
         rectangle_points_exception.value)
 
+
+
+def test_rectangle_points_have_no_instance_dict():
+    assert not hasattr(RECTANGLE, '__dict__')
+    assert not hasattr(RECTANGLE.get_top_left_point(), '__dict__')
+
+
+def test_rectangle_bounds_from_list():
+    rectangle = RectanglePoints([[67, 199], [254, 199], [67, 433], [254, 433]])
+
+    assert rectangle.get_top_left_point() == Point(67, 433)
+    assert rectangle.get_bottom_right_point() == Point(254, 199)
+    assert rectangle.get_top_left_point() != Point(67, 199)
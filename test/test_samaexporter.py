@@ -0,0 +1,178 @@
+import json
+
+import fiftyone as fo
+import fiftyone.core.metadata as fom
+import fiftyone.utils.data as foud
+import numpy as np
+import pytest
+
+from .context import (SAMADatasetImporter,
+                      SAMADatasetImporterException,
+                      SAMADatasetExporter,
+                      CustomLabeledImageDataset,
+                      make_task,
+                      write_delivery)
+
+TRUCK_SHAPE = {
+    "tags": {"Vehicle": "truck"},
+    "type": "rectangle",
+    "index": 2,
+    "points": [[200, 600], [200, 200], [800, 200], [800, 600]]
+}
+DATA = [
+    make_task(1, task_id="001", scene_attributes={"Time of day": "day"}),
+    make_task(2, task_id="002", empty_answers=True),
+]
+DATA[0]["answers"]["Image Annotation"]["layers"]["vector_tagging"][0]["shapes"].append(TRUCK_SHAPE)
+
+
+def _import(path):
+    dataSetImporter = SAMADatasetImporter(dataset_dir=str(path))
+    dataSetImporter.setup()
+    samples = list(iter(dataSetImporter))
+    dataSetImporter.close()
+    return samples
+
+
+def test_exporter_round_trip(tmp_path):
+    path = write_delivery(tmp_path / "delivery.json", DATA)
+    samples = _import(path)
+
+    exporter = SAMADatasetExporter(export_dir=str(tmp_path / "export"))
+    with exporter:
+        for filename, metadata, labels in samples:
+            exporter.export_sample(filename, labels, metadata=metadata)
+
+    exported = json.loads((tmp_path / "export" / "delivery.json").read_text())
+    assert exported[0]["data"]["Annotation Height"] == "720"
+    assert exported[0]["data"]["Annotation Width"] == "1280"
+    exported_samples = _import(tmp_path / "export" / "delivery.json")
+
+    assert [s[0] for s in exported_samples] == [s[0] for s in samples]
+    assert exported_samples[1][2] == {}
+    labels = exported_samples[0][2]
+    assert labels["Time of day"] == "day"
+    assert [d.Vehicle for d in labels["detections"].detections] == ["other_vehicle", "truck"]
+    assert np.allclose(
+        [d.bounding_box for d in labels["detections"].detections],
+        [d.bounding_box for d in samples[0][2]["detections"].detections])
+
+
+def test_from_bounding_boxes_to_points():
+    exporter = SAMADatasetExporter(labels_path="delivery.json")
+    points = exporter._from_voxel51_bounding_boxes_to_points(
+        [[0.1, 0.2, 0.5, 0.25]], 1000, 800)
+
+    assert points.tolist() == [[[100, 160], [600, 160], [100, 360], [600, 360]]]
+
+
+def test_detection_without_tags_exports_label(tmp_path):
+    exporter = SAMADatasetExporter(labels_path=str(tmp_path / "delivery.json"))
+    detections = fo.Detections(detections=[
+        fo.Detection(label="car", bounding_box=[0.1, 0.2, 0.5, 0.25])])
+    task = exporter._to_sama_task(
+        "https://asset.samasource.org/1.jpg", detections,
+        fom.ImageMetadata(width=1000, height=800))
+
+    shape = task["answers"]["Image Annotation"]["layers"]["vector_tagging"][0]["shapes"][0]
+    assert shape["tags"] == {"Label": "car"}
+
+
+def test_export_without_metadata(tmp_path):
+    exporter = SAMADatasetExporter(labels_path=str(tmp_path / "delivery.json"))
+
+    with pytest.raises(SAMADatasetImporterException):
+        exporter._to_sama_task("https://asset.samasource.org/1.jpg", None, None)
+
+
+@pytest.mark.parametrize("filepath", ["/data/images/img1.jpg", "http://asset.samasource.org/1.jpg"])
+def test_export_local_filepath(tmp_path, filepath):
+    exporter = SAMADatasetExporter(labels_path=str(tmp_path / "delivery.json"))
+
+    with pytest.raises(SAMADatasetImporterException) as exception:
+        exporter._to_sama_task(filepath, None, fom.ImageMetadata(width=1000, height=800))
+
+    assert 'is not an https URL' in str(exception.value)
+
+
+def test_write_dataset_of_local_samples(tmp_path):
+    sample = fo.Sample(
+        filepath="/data/images/img1.jpg",
+        metadata=fom.ImageMetadata(width=1000, height=800),
+        detections=fo.Detections(detections=[
+            fo.Detection(label="car", bounding_box=[0.1, 0.2, 0.5, 0.25])]))
+    exporter = SAMADatasetExporter(labels_path=str(tmp_path / "delivery.json"))
+
+    with pytest.raises(SAMADatasetImporterException):
+        foud.write_dataset(
+            [sample], foud.FiftyOneLabeledImageSampleParser("detections"), exporter,
+            progress=False)
+
+
+def test_write_dataset_rebuilds_urls(tmp_path):
+    # FiftyOne stores the filepaths of samples as local paths
+    sample = fo.Sample(
+        filepath="https://asset.samasource.org/1.jpg",
+        metadata=fom.ImageMetadata(width=1000, height=800),
+        detections=fo.Detections(detections=[
+            fo.Detection(label="car", bounding_box=[0.1, 0.2, 0.5, 0.25])]))
+    exporter = SAMADatasetExporter(labels_path=str(tmp_path / "delivery.json"))
+
+    foud.write_dataset(
+        [sample], foud.FiftyOneLabeledImageSampleParser("detections"), exporter,
+        progress=False)
+
+    exported = json.loads((tmp_path / "delivery.json").read_text())
+    assert exported[0]["id"] == "0"
+    assert exported[0]["data"]["Image"] == "https://asset.samasource.org/1.jpg"
+
+
+def test_write_dataset_round_trip_of_imported_samples(tmp_path):
+    path = write_delivery(tmp_path / "delivery.json", DATA)
+    dataSetImporter = SAMADatasetImporter(dataset_dir=path, sama_fields=True)
+    dataSetImporter.setup()
+    # Samples of a dataset have every field of the dataset, None if not set
+    samples = [fo.Sample(filepath=filename, metadata=metadata, **{"detections": None, **labels})
+               for filename, metadata, labels in iter(dataSetImporter)]
+    dataSetImporter.close()
+    exporter = SAMADatasetExporter(export_dir=str(tmp_path / "export"))
+
+    foud.write_dataset(
+        samples, 
+        foud.FiftyOneLabeledImageSampleParser({
+            "detections": "detections", "sama_url": "sama_url", 
+            "sama_task_id": "sama_task_id"}),
+        exporter, progress=False)
+
+    exported = json.loads((tmp_path / "export" / "delivery.json").read_text())
+    assert [task["id"] for task in exported] == ["001", "002"]
+    assert [task["data"]["Image"] for task in exported] == [
+        "https://asset.samasource.org/1.jpg", "https://asset.samasource.org/2.jpg"]
+    assert "sama_url" not in exported[0]["answers"]
+    exported_samples = _import(tmp_path / "export" / "delivery.json")
+    assert np.allclose(
+        [d.bounding_box for d in exported_samples[0][2]["detections"].detections],
+        [d.bounding_box for d in samples[0].detections.detections])
+
+
+def test_import_sama_fields(tmp_path):
+    path = write_delivery(tmp_path / "delivery.json", DATA)
+    for streaming in [False, True]:
+        dataSetImporter = SAMADatasetImporter(
+            dataset_dir=path, streaming=streaming, sama_fields=True)
+        dataSetImporter.setup()
+        labels = [labels for _, _, labels in iter(dataSetImporter)]
+        dataSetImporter.close()
+
+        assert [(l["sama_url"], l["sama_task_id"]) for l in labels] == [
+            ("https://asset.samasource.org/1.jpg", "001"), 
+            ("https://asset.samasource.org/2.jpg", "002")]
+
+
+def test_exporter_does_not_declare_label_cls():
+    # label_field is required, dictionaries of labels keep their scene attributes
+    assert SAMADatasetExporter(labels_path="delivery.json").label_cls is None
+
+
+def test_dataset_type_exporter():
+    assert CustomLabeledImageDataset().get_dataset_exporter_cls() is SAMADatasetExporter
@@ -0,0 +1,158 @@
+import json
+
+import pytest
+
+from .context import (SAMADatasetImporter,
+                      SAMADatasetImporterException,
+                      SCHEMA_SAMPLE_SIZE,
+                      asset_url,
+                      asset_urls,
+                      import_filepaths,
+                      make_task,
+                      write_delivery)
+
+
+def _task(i, url=None):
+    return make_task(i, url=url, empty_answers=True)
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_max_samples_stops_converting_tasks(tmp_path, monkeypatch, streaming):
+    path = write_delivery(tmp_path / "delivery.json", [_task(i) for i in range(100)])
+    converted = []
+    convert_sama_task = SAMADatasetImporter._convert_sama_task
+
+    def counting_convert(self, element):
+        converted.append(element["id"])
+        return convert_sama_task(self, element)
+
+    monkeypatch.setattr(SAMADatasetImporter, "_convert_sama_task", counting_convert)
+    dataSetImporter = SAMADatasetImporter(
+        dataset_dir=path, streaming=streaming, max_samples=5, metadata_workers=1)
+    filepaths = import_filepaths(dataSetImporter)
+    assert filepaths == asset_urls(range(5))
+    assert converted == [str(i) for i in range(5)]
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_max_samples_stops_reading_the_delivery(tmp_path, streaming):
+    # The tasks after the limit and the schema sample are never decoded, so
+    # a broken tail is not read
+    path = tmp_path / "delivery.json"
+    num_tasks = SCHEMA_SAMPLE_SIZE + 10
+    path.write_text(json.dumps([_task(i) for i in range(num_tasks)])[:-1] + ', {"id": ')
+    dataSetImporter = SAMADatasetImporter(
+        dataset_dir=str(path), streaming=streaming, max_samples=3, metadata_workers=1)
+
+    assert import_filepaths(dataSetImporter) == asset_urls(range(3))
+
+
+def test_max_samples_counts_distinct_assets(tmp_path):
+    tasks = [_task(0), _task(1, asset_url(0)), _task(2), _task(3)]
+    path = write_delivery(tmp_path / "delivery.json", tasks)
+    dataSetImporter = SAMADatasetImporter(dataset_dir=path, max_samples=2, metadata_workers=1)
+    assert import_filepaths(dataSetImporter) == [asset_url(0), asset_url(2)]
+    assert len(dataSetImporter) == 2
+
+
+def test_max_samples_keeps_the_last_duplicate(tmp_path):
+    # Asset 3 is delivered again after the first 4 assets
+    tasks = [make_task(i) for i in range(6)] + [
+        make_task(7, url=asset_url(3), num_shapes=0, scene_attributes={"T": "late"})]
+    path = write_delivery(tmp_path / "delivery.json", tasks)
+    dataSetImporter = SAMADatasetImporter(
+        dataset_dir=path, max_samples=4, duplicate_urls="last", metadata_workers=1)
+    dataSetImporter.setup()
+    samples = list(iter(dataSetImporter))
+    dataSetImporter.close()
+
+    assert [filepath for filepath, _, _ in samples] == asset_urls(range(4))
+    assert samples[3][2]["T"] == "late"
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_shuffle_is_seeded(tmp_path, streaming):
+    path = write_delivery(tmp_path / "delivery.json", [_task(i) for i in range(50)])
+
+    def shuffled(seed):
+        return import_filepaths(SAMADatasetImporter(
+            dataset_dir=path, streaming=streaming, shuffle=True, seed=seed,
+            max_samples=10, metadata_workers=1))
+
+    filepaths = shuffled(0)
+    assert len(set(filepaths)) == 10
+    assert filepaths == shuffled(0)
+    assert filepaths != shuffled(1)
+
+
+def test_shuffle_without_max_samples_imports_every_sample(tmp_path):
+    path = write_delivery(tmp_path / "delivery.json", [_task(i) for i in range(20)])
+    dataSetImporter = SAMADatasetImporter(
+        dataset_dir=path, shuffle=True, seed=3, metadata_workers=1)
+    filepaths = import_filepaths(dataSetImporter)
+    assert sorted(filepaths) == sorted(asset_urls(range(20)))
+    assert filepaths != asset_urls(range(20))
+
+
+def test_reservoir_only_converts_the_drawn_tasks(tmp_path, monkeypatch):
+    path = write_delivery(tmp_path / "delivery.json", [_task(i) for i in range(200)])
+    converted = []
+    convert_sama_task = SAMADatasetImporter._convert_sama_task
+
+    def counting_convert(self, element):
+        converted.append(element["id"])
+        return convert_sama_task(self, element)
+
+    monkeypatch.setattr(SAMADatasetImporter, "_convert_sama_task", counting_convert)
+    dataSetImporter = SAMADatasetImporter(
+        dataset_dir=path, streaming=True, shuffle=True, seed=0, max_samples=8,
+        metadata_workers=1)
+    filepaths = import_filepaths(dataSetImporter)
+    assert len(converted) == 8
+    assert filepaths == asset_urls(converted)
+    assert dataSetImporter.manifest[0].num_tasks == 200
+
+
+def test_reservoir_draws_distinct_assets(tmp_path):
+    tasks = [_task(i, asset_url(i % 5)) for i in range(10)]
+    path = write_delivery(tmp_path / "delivery.json", tasks)
+
+    for seed in range(20):
+        dataSetImporter = SAMADatasetImporter(
+            dataset_dir=path, streaming=True, shuffle=True, seed=seed, max_samples=5,
+            metadata_workers=1)
+        filepaths = import_filepaths(dataSetImporter)
+        assert sorted(filepaths) == asset_urls(range(5))
+
+
+def test_reservoir_with_duplicate_error(tmp_path):
+    tasks = [_task(0), _task(1, asset_url(0))]
+    path = write_delivery(tmp_path / "delivery.json", tasks)
+    dataSetImporter = SAMADatasetImporter(
+        dataset_dir=path, streaming=True, shuffle=True, max_samples=1, duplicate_urls="error")
+
+    with pytest.raises(SAMADatasetImporterException):
+        import_filepaths(dataSetImporter)
+
+
+def test_reservoir_draws_uniformly(tmp_path):
+    path = write_delivery(tmp_path / "delivery.json", [_task(i) for i in range(10)])
+    counts = [0] * 10
+    for seed in range(500):
+        dataSetImporter = SAMADatasetImporter(
+            dataset_dir=path, streaming=True, shuffle=True, seed=seed, max_samples=3,
+            metadata_workers=1)
+        for filepath in import_filepaths(dataSetImporter):
+            counts[int(filepath.rsplit("/", 1)[1].split(".")[0])] += 1
+    # Every task is drawn with probability 3/10, 150 times out of 500 on average
+    assert all(100 < count < 200 for count in counts)
+
+
+@pytest.mark.parametrize("options", [
+    {"streaming": True, "shuffle": True},
+    {"shuffle": True, "checkpoint_path": "checkpoint.json"},
+    {"max_samples": 5, "delta_path": "delta.json"},
+])
+def test_unsupported_sample_limit_options(options):
+    with pytest.raises(SAMADatasetImporterException):
+        SAMADatasetImporter(dataset_dir="delivery.json", **options)
@@ -0,0 +1,75 @@
+import fiftyone.core.metadata as fom
+import pytest
+
+from .context import (SAMADatasetImporter,
+                      SAMADatasetImporterException,
+                      MetadataMode,
+                      ImageMetadataFetcher,
+                      make_task,
+                      write_delivery)
+
+DATA = [
+    make_task(1, url="https://asset.samasource.org/asset01.jpg", task_id="001", empty_answers=True),
+    make_task(2, url="https://asset.samasource.org/asset02.png", task_id="002", empty_answers=True,
+              size=None),
+]
+
+
+@pytest.fixture
+def fetched_urls(monkeypatch):
+    urls = []
+
+    def fetch(self, url):
+        urls.append(url)
+        return fom.ImageMetadata(width=1, height=1)
+
+    monkeypatch.setattr(ImageMetadataFetcher, "fetch", fetch)
+    return urls
+
+
+def _import(tmp_path, **kwargs):
+    path = write_delivery(tmp_path / "delivery.json", DATA)
+    dataSetImporter = SAMADatasetImporter(dataset_dir=path, **kwargs)
+    dataSetImporter.setup()
+    samples = list(iter(dataSetImporter))
+    dataSetImporter.close()
+    return samples
+
+
+def test_metadata_from_task_data(tmp_path, fetched_urls):
+    samples = _import(tmp_path)
+    _, metadata, _ = samples[0]
+
+    assert metadata.width == 1280
+    assert metadata.height == 720
+    assert metadata.mime_type == "image/jpeg"
+    assert fetched_urls == ["https://asset.samasource.org/asset02.png"]
+
+
+def test_mime_type_of_a_pre_signed_url():
+    dataSetImporter = SAMADatasetImporter()
+    metadata = dataSetImporter._request_sample_metadata(
+        "https://bucket.s3.amazonaws.com/asset01.jpg?X-Amz-Expires=3600&X-Amz-Signature=abc",
+        (1280, 720))
+
+    assert metadata.mime_type == "image/jpeg"
+
+
+def test_metadata_without_fallback(tmp_path, fetched_urls):
+    samples = _import(tmp_path, metadata_fallback=False)
+
+    assert samples[1][1] is None
+    assert fetched_urls == []
+
+
+def test_metadata_fetch_mode(tmp_path, fetched_urls):
+    _import(tmp_path, metadata=MetadataMode.FETCH.value)
+
+    assert fetched_urls == [
+        "https://asset.samasource.org/asset01.jpg",
+        "https://asset.samasource.org/asset02.png"]
+
+
+def test_non_valid_metadata_option():
+    with pytest.raises(SAMADatasetImporterException):
+        SAMADatasetImporter(metadata='header')
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from .context import (SAMADatasetImporter,
+                      SlowTaskReport,
+                      make_task,
+                      write_delivery)
+
+
+@pytest.mark.parametrize("options", [{}, {"streaming": True}, {"num_workers": 2}])
+def test_report_the_slowest_tasks(tmp_path, options):
+    delivery_path = tmp_path / "delivery.json"
+    write_delivery(delivery_path, [make_task(i, num_shapes=num_shapes)
+                                   for i, num_shapes in enumerate([1, 300, 2])])
+    report_path = tmp_path / "slow_tasks.json"
+    dataSetImporter = SAMADatasetImporter(
+        dataset_dir=str(delivery_path), slow_tasks=2, slow_tasks_path=str(report_path), **options)
+    dataSetImporter.setup()
+    list(iter(dataSetImporter))
+    dataSetImporter.close()
+
+    report = json.loads(report_path.read_text())
+    assert report["num_tasks"] == 3
+    assert len(report["tasks"]) == 2
+    slowest = report["tasks"][0]
+    assert slowest["id"] == "1"
+    assert slowest["url"] == "https://asset.samasource.org/1.jpg"
+    assert slowest["num_shapes"] == 300
+    assert slowest["serialized_size"] == len(json.dumps(make_task(1, num_shapes=300)))
+    assert 0 < slowest["share"] <= 1
+
+
+def test_report_keeps_top_n():
+    report = SlowTaskReport(size=2)
+    for i, seconds in enumerate([0.3, 0.1, 0.5, 0.2]):
+        report.record(seconds, str(i), f"https://asset.samasource.org/{i}.jpg", 1, 100)
+
+    assert [task["id"] for task in report.top()] == ["2", "0"]
+    assert report.num_tasks == 4
+    assert report.total_seconds == pytest.approx(1.1)
+
+
+def test_tasks_are_not_timed_by_default():
+    dataSetImporter = SAMADatasetImporter()
+
+    assert dataSetImporter.slow_task_report is None
+    assert dataSetImporter._convert_sama_element(make_task(0, num_shapes=1)).profile is None
@@ -0,0 +1,87 @@
+import json
+
+import pytest
+
+from .context import (SAMADatasetImporter,
+                      SAMADatasetImporterException,
+                      DuplicateUrl,
+                      make_task,
+                      write_delivery)
+
+DATA = [make_task(i, scene_attributes={"Time of day": "day"}) for i in range(5)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 20])
+def test_iter_sama_tasks_small_chunks(tmp_path, chunk_size):
+    path = write_delivery(tmp_path / "delivery.json", DATA, indent=2)
+    dataSetImporter = SAMADatasetImporter()
+    tasks = list(dataSetImporter._iter_sama_tasks(path, chunk_size=chunk_size))
+
+    assert tasks == DATA
+
+
+def test_iter_sama_tasks_empty_delivery(tmp_path):
+    path = write_delivery(tmp_path / "delivery.json", [])
+    dataSetImporter = SAMADatasetImporter()
+
+    assert list(dataSetImporter._iter_sama_tasks(path)) == []
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 64])
+def test_iter_sama_tasks_leading_whitespace(tmp_path, chunk_size):
+    path = tmp_path / "delivery.json"
+    path.write_text("  \n [ ] ")
+    dataSetImporter = SAMADatasetImporter()
+
+    assert list(dataSetImporter._iter_sama_tasks(str(path), chunk_size=chunk_size)) == []
+
+
+def test_iter_sama_tasks_not_a_list(tmp_path):
+    path = tmp_path / "delivery.json"
+    path.write_text("   ")
+    dataSetImporter = SAMADatasetImporter()
+
+    with pytest.raises(SAMADatasetImporterException) as exception:
+        list(dataSetImporter._iter_sama_tasks(str(path), chunk_size=1))
+
+    assert 'not a list of tasks' in str(exception.value)
+
+
+def test_iter_sama_tasks_truncated_delivery(tmp_path):
+    path = tmp_path / "delivery.json"
+    path.write_text(json.dumps(DATA)[:-20])
+    dataSetImporter = SAMADatasetImporter()
+
+    with pytest.raises(SAMADatasetImporterException) as exception:
+        list(dataSetImporter._iter_sama_tasks(str(path), chunk_size=64))
+
+    assert 'truncated or malformed' in str(exception.value)
+
+
+def test_streaming_matches_eager_import(tmp_path):
+    path = write_delivery(tmp_path / "delivery.json", DATA + [DATA[0]])
+    eager = SAMADatasetImporter(dataset_dir=path)
+    eager.setup()
+    streamed = SAMADatasetImporter(dataset_dir=path, streaming=True)
+    streamed.setup()
+
+    eager_labels = list(eager._iter_sample_labels())
+    streamed_labels = list(streamed._iter_sample_labels())
+
+    assert [url for url, _, _ in streamed_labels] == [url for url, _, _ in eager_labels]
+    assert [labels['detections'].detections[0].bounding_box for _, labels, _ in streamed_labels] == [
+        labels['detections'].detections[0].bounding_box for _, labels, _ in eager_labels]
+
+
+def test_streaming_has_no_length(tmp_path):
+    dataSetImporter = SAMADatasetImporter(
+        dataset_dir=write_delivery(tmp_path / "delivery.json", DATA), streaming=True)
+    dataSetImporter.setup()
+
+    with pytest.raises(TypeError):
+        len(dataSetImporter)
+
+
+def test_streaming_does_not_support_last_duplicate():
+    with pytest.raises(SAMADatasetImporterException):
+        SAMADatasetImporter(streaming=True, duplicate_urls=DuplicateUrl.LAST.value)
@@ -0,0 +1,51 @@
+import pytest
+
+from .context import (SAMADatasetImporter,
+                      SAMADatasetImporterException,
+                      TaskContext)
+
+DATA = {
+    "id": "001",
+    "data": {
+        "Name": "asset01.jpg",
+        "Image": "https://asset.samasource.org",
+        "Annotation Height": "720",
+        "Annotation Width": "1280"
+    },
+    "answers": {
+        "Image Annotation": {
+            "layers": {"vector_tagging": []}
+        }
+    },
+}
+
+
+def test_build_task_context():
+    dataSetImporter = SAMADatasetImporter()
+    context = dataSetImporter._build_task_context(DATA)
+
+    assert context.url == "https://asset.samasource.org"
+    assert context.layers == {"layers": {"vector_tagging": []}}
+    assert context.get_image_size() == (1280, 720)
+
+
+def test_task_context_searches_task_data_once(monkeypatch):
+    dataSetImporter = SAMADatasetImporter()
+    context = dataSetImporter._build_task_context(DATA)
+
+    def fail(*args):
+        raise AssertionError("the task data was searched again")
+
+    monkeypatch.setattr(dataSetImporter, "_search_substring_in_dictionary", fail)
+    bounding_box = dataSetImporter._from_points_to_voxel51_bounding_box(
+        [[67, 199], [254, 199], [67, 433], [254, 433]], context)
+
+    assert bounding_box == [0.05234375, 0.6013888888888889, 0.14609375, -0.325]
+
+
+def test_task_context_without_image_size():
+    context = TaskContext(DATA, "https://asset.samasource.org", None)
+
+    assert not context.has_image_size()
+    with pytest.raises(SAMADatasetImporterException):
+        context.get_image_size()
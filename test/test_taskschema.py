@@ -0,0 +1,106 @@
+import pytest
+
+from .context import (SAMADatasetImporter,
+                      SAMADatasetImporterException,
+                      TaskSchema)
+
+SHAPE = {
+    "tags": {"Vehicle": "other_vehicle"},
+    "type": "rectangle",
+    "index": 1,
+    "points": [[67, 199], [254, 199], [67, 433], [254, 433]]
+}
+
+PLATFORM_TASK = {
+    "id": "001",
+    "data": {
+        "Name": "asset01.jpg",
+        "Image": "https://asset.samasource.org/1.jpg",
+        "Annotation Height": "720",
+        "Annotation Width": "1280"
+    },
+    "answers": {
+        "Time of day": "day",
+        "Image Annotation": {"layers": {"vector_tagging": [{"shapes": [SHAPE]}]}}
+    },
+}
+
+GO_TASK = {
+    "id": "002",
+    "data": {
+        "url": "https://asset.samasource.org/2.jpg",
+        "Asset Height": 720,
+        "Asset Width": 1280
+    },
+    "answers": {"_vector": {"layers": {"vector_tagging": [{"shapes": [SHAPE]}]}}},
+}
+
+
+def test_infer_platform_schema():
+    dataSetImporter = SAMADatasetImporter()
+    schema = dataSetImporter._infer_task_schema([PLATFORM_TASK])
+
+    assert schema.url == ('data', 'Image')
+    assert schema.width == ('data', 'Annotation Width')
+    assert schema.height == ('data', 'Annotation Height')
+    assert schema.layers == ('answers', 'Image Annotation')
+
+
+def test_infer_sama_go_schema():
+    dataSetImporter = SAMADatasetImporter()
+    schema = dataSetImporter._infer_task_schema([GO_TASK])
+
+    assert schema.url == ('data', 'url')
+    assert schema.layers == ('answers', '_vector')
+
+
+def test_schema_context_matches_searched_context():
+    dataSetImporter = SAMADatasetImporter(infer_schema=False)
+    schema = SAMADatasetImporter()._infer_task_schema([PLATFORM_TASK])
+
+    context = schema.build_context(PLATFORM_TASK)
+    searched_context = dataSetImporter._build_task_context(PLATFORM_TASK)
+
+    for field in ('url', 'layers', 'image_width', 'image_height'):
+        assert getattr(context, field) == getattr(searched_context, field)
+
+
+def test_task_not_following_schema_falls_back_to_search():
+    dataSetImporter = SAMADatasetImporter()
+    dataSetImporter._prepare_task_schema([PLATFORM_TASK])
+
+    assert dataSetImporter._task_schema.build_context(GO_TASK) is None
+    context = dataSetImporter._build_task_context(GO_TASK)
+
+    assert context.url == "https://asset.samasource.org/2.jpg"
+    assert context.get_image_size() == (1280, 720)
+
+
+def test_empty_answer_follows_schema():
+    schema = SAMADatasetImporter()._infer_task_schema([PLATFORM_TASK])
+    context = schema.build_context({**PLATFORM_TASK, "answers": {}})
+
+    assert context is not None
+    assert context.layers is None
+
+
+def test_user_task_schema_overrides_inferred_keys():
+    dataSetImporter = SAMADatasetImporter(task_schema={'url': 'data.Name'})
+    task = {**PLATFORM_TASK, "data": {**PLATFORM_TASK["data"], "Name": "https://mirror.org/1.jpg"}}
+    dataSetImporter._prepare_task_schema([task])
+
+    assert dataSetImporter._build_task_context(task).url == "https://mirror.org/1.jpg"
+    assert dataSetImporter._task_schema.width == ('data', 'Annotation Width')
+
+
+def test_parse_path():
+    assert TaskSchema.parse_path('data."Annotation Width"') == ('data', 'Annotation Width')
+    assert TaskSchema.parse_path('answers."a.b".layers') == ('answers', 'a.b', 'layers')
+
+    with pytest.raises(SAMADatasetImporterException):
+        TaskSchema.parse_path('data..Image')
+
+
+def test_non_valid_task_schema_field():
+    with pytest.raises(SAMADatasetImporterException):
+        SAMADatasetImporter(task_schema={'name': 'data.Name'})
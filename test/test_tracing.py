@@ -0,0 +1,54 @@
+import json
+
+from .context import (SAMADatasetImporter,
+                      ChromeTracer,
+                      make_task,
+                      write_delivery)
+
+TASK = make_task(1, task_id="001", scene_attributes={"Time of day": "day"})
+
+
+def _import(delivery_path, tracer):
+    dataSetImporter = SAMADatasetImporter(dataset_dir=delivery_path, tracer=tracer)
+    dataSetImporter.setup()
+    samples = list(iter(dataSetImporter))
+    dataSetImporter.close()
+    return samples
+
+
+def test_chrome_trace_file(tmp_path):
+    delivery_path = write_delivery(tmp_path / "delivery.json", [TASK])
+    trace_path = tmp_path / "trace.json"
+
+    samples = _import(delivery_path, str(trace_path))
+
+    assert len(samples) == 1
+    events = json.loads(trace_path.read_text())["traceEvents"]
+    names = {event["name"] for event in events}
+    assert {"setup", "__next__", "_convert_sama_element", "_get_detections_fields",
+            "_request_sample_metadata"} <= names
+    assert all(event["ph"] == "X" and event["dur"] >= 0 for event in events)
+
+
+def test_tracer_callback(tmp_path):
+    delivery_path = write_delivery(tmp_path / "delivery.json", [TASK])
+    spans = []
+
+    _import(delivery_path, lambda name, start, duration, args: spans.append(name))
+
+    assert spans.count("setup") == 1
+    assert spans.count("__next__") == 2 # The last one raises StopIteration
+
+
+def test_trace_helper_method():
+    tracer = ChromeTracer()
+    dataSetImporter = SAMADatasetImporter(tracer=tracer)
+    dataSetImporter._get_answers_layers(TASK)
+
+    assert [event["name"] for event in tracer.events] == ["_get_answers_layers"]
+
+
+def test_untraced_importer_keeps_plain_methods():
+    dataSetImporter = SAMADatasetImporter()
+
+    assert "_convert_sama_element" not in vars(dataSetImporter)
@@ -0,0 +1,48 @@
+from .context import (SAMADatasetImporter,
+                      Vocabulary,
+                      make_task,
+                      write_delivery)
+
+
+def test_intern_shares_equal_strings():
+    vocabulary = Vocabulary()
+    first = vocabulary.intern("".join(["other_", "vehicle"]))
+    second = vocabulary.intern("".join(["other", "_vehicle"]))
+
+    assert first is second
+    assert vocabulary.encode(first) == vocabulary.get_code("other_vehicle") == 0
+    assert vocabulary.decode(0) == "other_vehicle"
+
+
+def test_intern_keeps_other_types():
+    vocabulary = Vocabulary()
+    vocabulary.encode(1)
+
+    assert vocabulary.intern(True) is True
+    assert vocabulary.encode(True) != vocabulary.encode(1)
+    assert vocabulary.intern(["day", "night"]) == ["day", "night"]
+
+
+def test_intern_stops_growing_at_max_interned():
+    vocabulary = Vocabulary(max_interned=1)
+    vocabulary.intern("day")
+    vocabulary.intern("night")
+
+    assert "night" not in vocabulary
+    assert vocabulary.intern_always("night") == "night"
+    assert len(vocabulary) == 2
+
+
+def test_delivery_strings_are_shared(tmp_path):
+    path = tmp_path / "delivery.json"
+    write_delivery(path, [make_task(i, scene_attributes={"Time of day": "day"}) for i in range(2)])
+    dataSetImporter = SAMADatasetImporter(dataset_dir=str(path), num_workers=2)
+    dataSetImporter.setup()
+
+    store = dataSetImporter.annotation_store
+    first, second = store.scene_attributes
+    assert next(iter(first)) is next(iter(second))
+    assert first["Time of day"] is second["Time of day"]
+    values = store.tags["Vehicle"][1]
+    assert values[0] is values[1]
+    assert store.label_codes.tolist() == [dataSetImporter.vocabulary.get_code("other_vehicle")] * 2